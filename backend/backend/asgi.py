@@ -0,0 +1,8 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Under ASGI the polling endpoints are served by the async views
+os.environ.setdefault('POS_ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
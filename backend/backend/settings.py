@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -26,6 +28,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'pos.metrics.RequestMetricsMiddleware',
+    'pos.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -59,19 +63,62 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Database
 # Default: SQLite for quick local testing. Configure PostgreSQL in env for production.
+# Database connections are kept open between requests for POS_DB_CONN_MAX_AGE
+# seconds (0 closes them after every request, None keeps them forever) and
+# checked before reuse. POS_DB_POOL=1 switches PostgreSQL to Django's
+# psycopg 3 connection pool instead (needs `pip install "psycopg[pool]"`);
+# POS_DB_PGBOUNCER=1 makes the settings safe behind pgbouncer in
+# transaction pooling mode.
+_conn_max_age = os.environ.get('POS_DB_CONN_MAX_AGE', '60')
+POS_DB_CONN_MAX_AGE = None if _conn_max_age.lower() == 'none' else int(_conn_max_age)
+POS_DB_CONN_HEALTH_CHECKS = os.environ.get('POS_DB_CONN_HEALTH_CHECKS', '1') == '1'
+POS_DB_POOL = os.environ.get('POS_DB_POOL', '0') == '1'
+POS_DB_POOL_MIN_SIZE = int(os.environ.get('POS_DB_POOL_MIN_SIZE', '2'))
+# Matches the gunicorn thread count, so no request waits for a connection
+POS_DB_POOL_MAX_SIZE = int(os.environ.get('POS_DB_POOL_MAX_SIZE', '32'))
+POS_DB_POOL_TIMEOUT = int(os.environ.get('POS_DB_POOL_TIMEOUT', '10'))
+POS_DB_PGBOUNCER = os.environ.get('POS_DB_PGBOUNCER', '0') == '1'
+
 if os.environ.get('DATABASE_URL'):
     # If DATABASE_URL provided, try to use dj-database-url (not required for the prototype)
     import dj_database_url
 
-    DATABASES = {'default': dj_database_url.parse(os.environ['DATABASE_URL'])}
+    DATABASES = {'default': dj_database_url.parse(
+        os.environ['DATABASE_URL'],
+        conn_max_age=POS_DB_CONN_MAX_AGE,
+        conn_health_checks=POS_DB_CONN_HEALTH_CHECKS,
+    )}
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        if POS_DB_POOL:
+            # The pool owns connection lifetimes; Django requires CONN_MAX_AGE = 0 with it
+            DATABASES['default']['CONN_MAX_AGE'] = 0
+            DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+                'min_size': POS_DB_POOL_MIN_SIZE,
+                'max_size': POS_DB_POOL_MAX_SIZE,
+                'timeout': POS_DB_POOL_TIMEOUT,
+            }
+        if POS_DB_PGBOUNCER:
+            # Server-side cursors do not survive transaction pooling
+            DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': POS_DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': POS_DB_CONN_HEALTH_CHECKS,
         }
     }
 
+# Cache shared by every process on the host (gunicorn workers and manage.py
+# commands), so menu version bumps are seen everywhere
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -92,8 +139,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        # orjson-backed when orjson is installed, stdlib json otherwise
+        'pos.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'pos.authentication.CachedTokenAuthentication',
         # SessionAuthentication removed - it enforces CSRF checks
     ],
 }
@@ -101,6 +153,8 @@ REST_FRAMEWORK = {
 # CORS for local React dev
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Disable CSRF for API endpoints
 CSRF_TRUSTED_ORIGINS = ['http://localhost:3000', 'http://localhost:3001', 'http://127.0.0.1:3000', 'http://127.0.0.1:3001']
@@ -109,5 +163,38 @@ CSRF_TRUSTED_ORIGINS = ['http://localhost:3000', 'http://localhost:3001', 'http:
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'no-reply@example.com')
 
+# Order event stream (Server-Sent Events)
+POS_EVENT_STREAM_TIMEOUT = int(os.environ.get('POS_EVENT_STREAM_TIMEOUT', '300'))
+POS_EVENT_KEEPALIVE_SECONDS = int(os.environ.get('POS_EVENT_KEEPALIVE_SECONDS', '15'))
+POS_EVENT_RETRY_MS = int(os.environ.get('POS_EVENT_RETRY_MS', '3000'))
+# Streams a WSGI process serves at once (each holds a thread; 0 disables the cap)
+POS_EVENT_MAX_STREAMS = int(os.environ.get('POS_EVENT_MAX_STREAMS', '16'))
+
+# Background bill jobs (python manage.py run_bill_worker)
+POS_BILL_WORKER_CONCURRENCY = int(os.environ.get('POS_BILL_WORKER_CONCURRENCY', '2'))
+POS_BILL_JOB_MAX_ATTEMPTS = int(os.environ.get('POS_BILL_JOB_MAX_ATTEMPTS', '5'))
+POS_BILL_JOB_BACKOFF_SECONDS = int(os.environ.get('POS_BILL_JOB_BACKOFF_SECONDS', '10'))
+POS_BILL_JOB_STALE_SECONDS = int(os.environ.get('POS_BILL_JOB_STALE_SECONDS', '600'))
+
+# Serve the polling endpoints (orders list, menu, table stats, event stream)
+# with the async views in pos.async_views; backend.asgi turns this on
+POS_ASYNC_VIEWS = os.environ.get('POS_ASYNC_VIEWS', '0') == '1'
+
+# Request instrumentation: Server-Timing headers and /metrics
+POS_METRICS_ENABLED = os.environ.get('POS_METRICS_ENABLED', '1') == '1'
+# Log a query trace for requests slower than this (0 disables)
+POS_SLOW_REQUEST_MS = int(os.environ.get('POS_SLOW_REQUEST_MS', '0'))
+
+# Token -> user cache used by CachedTokenAuthentication (per process, invalidated through the default cache)
+POS_TOKEN_CACHE_SIZE = int(os.environ.get('POS_TOKEN_CACHE_SIZE', '1024'))
+POS_TOKEN_CACHE_TTL = int(os.environ.get('POS_TOKEN_CACHE_TTL', '60'))
+
+# Response compression (brotli when the brotli package is installed, else gzip)
+POS_COMPRESS_MIN_BYTES = int(os.environ.get('POS_COMPRESS_MIN_BYTES', '1024'))
+POS_COMPRESS_LEVEL = int(os.environ.get('POS_COMPRESS_LEVEL', '5'))
+
+# How long (seconds) order submissions are remembered for Idempotency-Key replays
+POS_IDEMPOTENCY_KEY_TTL = int(os.environ.get('POS_IDEMPOTENCY_KEY_TTL', '86400'))
+
 # Custom user model
 AUTH_USER_MODEL = os.environ.get('AUTH_USER_MODEL', 'pos.User')
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
-from .models import MenuItem, MenuCategory, Order, OrderItem
+from .models import ArchivedOrder, ArchivedOrderItem, BillJob, MenuItem, MenuCategory, Order, OrderItem, SalesRollup
 
 User = get_user_model()
 
@@ -25,11 +25,55 @@ class MenuItemAdmin(admin.ModelAdmin):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'guest_name', 'table_number', 'waiter', 'status', 'created_at')
+    list_display = ('id', 'guest_name', 'table_number', 'waiter', 'status', 'total', 'item_count', 'created_at')
     list_filter = ('status', 'created_at')
+    readonly_fields = ('total', 'item_count')
     inlines = [OrderItemInline]
 
 
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    can_delete = False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'guest_name', 'table_number', 'waiter', 'total', 'created_at', 'archived_at')
+    list_filter = ('created_at',)
+    inlines = [ArchivedOrderItemInline]
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SalesRollup)
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('period', 'bucket', 'dimension', 'label', 'revenue', 'quantity', 'orders')
+    list_filter = ('period', 'dimension')
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(BillJob)
+class BillJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order', 'kind', 'email', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('kind', 'status')
+
+
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('username', 'email', 'role', 'is_staff')
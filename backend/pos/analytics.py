@@ -0,0 +1,173 @@
+"""Hourly / daily sales rollups.
+
+Rollups are aggregated in SQL from closed orders (live and archived),
+bucketed by the time the order was placed: revenue totals per hour and per
+day, and per menu item / category / waiter per day. Closing an order adds
+its figures to the existing rollup rows with conditional UPDATEs, so
+concurrent closes never rewrite each other's rows.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, SalesRollup
+
+logger = logging.getLogger(__name__)
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+CENTS = Decimal('0.01')
+REBUILD_CHUNK = timedelta(days=31)
+
+
+def _day_start(value):
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _placed_between(start, end):
+    """(orders, items, item name field) of the closed live and archived orders placed in [start, end)"""
+    sources = [
+        (Order.objects.filter(status=Order.STATUS_CLOSED),
+         OrderItem.objects.filter(order__status=Order.STATUS_CLOSED), 'menu_item__name'),
+        (ArchivedOrder.objects.all(), ArchivedOrderItem.objects.all(), 'menu_item_name'),
+    ]
+    return [(orders.filter(created_at__gte=start, created_at__lt=end),
+             items.filter(order__created_at__gte=start, order__created_at__lt=end), item_name)
+            for orders, items, item_name in sources]
+
+
+def _aggregate(sources):
+    """{(period, bucket, dimension, key): [label, revenue, quantity, orders]} for the orders of `sources`"""
+    rows = {}
+
+    def add(period, row, dimension, key=None):
+        entry = rows.setdefault((period, row['bucket'], dimension, '' if key is None else str(key)),
+                                [row.get('label') or '', Decimal('0'), 0, 0])
+        entry[1] += row['revenue'] or 0
+        entry[2] += row['quantity'] or 0
+        entry[3] += row['n'] or 0
+
+    for orders, items, item_name in sources:
+        items = items.annotate(bucket=TruncDay('order__created_at'), line_total=F('unit_price') * F('quantity'))
+        order_sums = {'revenue': Sum('total'), 'quantity': Sum('item_count'), 'n': Count('id')}
+
+        for period, trunc in ((SalesRollup.PERIOD_HOUR, TruncHour), (SalesRollup.PERIOD_DAY, TruncDay)):
+            for row in orders.annotate(bucket=trunc('created_at')).values('bucket').annotate(**order_sums).order_by():
+                add(period, row, SalesRollup.DIMENSION_TOTAL)
+        by_waiter = (orders.annotate(bucket=TruncDay('created_at')).values('bucket', 'waiter_id')
+                     .annotate(label=Max('waiter__username'), **order_sums).order_by())
+        for row in by_waiter:
+            add(SalesRollup.PERIOD_DAY, row, SalesRollup.DIMENSION_WAITER, row['waiter_id'])
+        for dimension, key, label in [
+            (SalesRollup.DIMENSION_ITEM, 'menu_item_id', item_name),
+            (SalesRollup.DIMENSION_CATEGORY, 'menu_item__category_id', 'menu_item__category__name'),
+        ]:
+            grouped = (items.values('bucket', key)
+                       .annotate(label=Max(label), revenue=Sum('line_total', output_field=MONEY),
+                                 quantity=Sum('quantity'), n=Count('order_id', distinct=True))
+                       .order_by())
+            for row in grouped:
+                add(SalesRollup.PERIOD_DAY, row, dimension, row[key])
+    return rows
+
+
+@transaction.atomic
+def rebuild(start, end):
+    """Recompute the rollups of every day overlapping [start, end); returns the number of rows"""
+    start = _day_start(start)
+    end = _day_start(end - timedelta(microseconds=1)) + timedelta(days=1)
+    rows = _aggregate(_placed_between(start, end))
+    SalesRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+    SalesRollup.objects.bulk_create([
+        SalesRollup(period=period, bucket=bucket, dimension=dimension, key=key,
+                    label=label, revenue=revenue, quantity=quantity, orders=orders)
+        for (period, bucket, dimension, key), (label, revenue, quantity, orders) in rows.items()
+    ], batch_size=1000)
+    return len(rows)
+
+
+def rebuild_all():
+    """Recompute all rollups from scratch, a month at a time"""
+    bounds = [Order.objects.aggregate(first=Min('created_at'), last=Max('created_at')),
+              ArchivedOrder.objects.aggregate(first=Min('created_at'), last=Max('created_at'))]
+    firsts = [b['first'] for b in bounds if b['first']]
+    if not firsts:
+        SalesRollup.objects.all().delete()
+        return 0
+    start = _day_start(min(firsts))
+    end = _day_start(max(b['last'] for b in bounds if b['last'])) + timedelta(days=1)
+    SalesRollup.objects.filter(bucket__lt=start).delete()
+    SalesRollup.objects.filter(bucket__gte=end).delete()
+    rows = 0
+    while start < end:
+        rows += rebuild(start, min(start + REBUILD_CHUNK, end))
+        start += REBUILD_CHUNK
+    return rows
+
+
+def _add(rows):
+    """Add aggregated figures to the rollup rows, creating missing ones"""
+    # A fixed order, so concurrent closes lock shared rows in the same order
+    for (period, bucket, dimension, key), (label, revenue, quantity, orders) in sorted(rows.items()):
+        lookup = {'period': period, 'bucket': bucket, 'dimension': dimension, 'key': key}
+        increments = {'label': label, 'revenue': F('revenue') + revenue, 'quantity': F('quantity') + quantity,
+                      'orders': F('orders') + orders}
+        if SalesRollup.objects.filter(**lookup).update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                SalesRollup.objects.create(**lookup, label=label, revenue=revenue, quantity=quantity, orders=orders)
+        except IntegrityError:
+            # Another close created the row in the meantime
+            SalesRollup.objects.filter(**lookup).update(**increments)
+
+
+def record_closed_orders(pks):
+    """Add newly closed orders to the rollups; call once the close has committed.
+
+    A failure is logged rather than raised: the orders are closed either
+    way, and rebuild_sales_rollups recomputes the days from scratch.
+    """
+    sources = [(Order.objects.filter(pk__in=pks, status=Order.STATUS_CLOSED),
+                OrderItem.objects.filter(order_id__in=pks, order__status=Order.STATUS_CLOSED), 'menu_item__name')]
+    try:
+        with transaction.atomic():
+            _add(_aggregate(sources))
+    except Exception:
+        logger.exception('Could not add closed orders %s to the sales rollups', pks)
+
+
+GROUP_BY = ['hour', 'day', 'item', 'category', 'waiter']
+
+
+def _money(value):
+    # SUM() drops the scale on some backends (1500 vs 1500.00)
+    return (value or Decimal('0')).quantize(CENTS)
+
+
+def sales(group_by, start, end):
+    """Rows of {bucket or key/label, revenue, quantity, orders} for orders placed in [start, end)"""
+    if group_by in (SalesRollup.PERIOD_HOUR, SalesRollup.PERIOD_DAY):
+        rows = (SalesRollup.objects.filter(period=group_by, dimension=SalesRollup.DIMENSION_TOTAL,
+                                           bucket__gte=start, bucket__lt=end)
+                .order_by('bucket').values('bucket', 'revenue', 'quantity', 'orders'))
+        return [{**row, 'revenue': _money(row['revenue'])} for row in rows]
+    # Per-key rollups are daily; `start` / `end` are day boundaries
+    rows = (SalesRollup.objects.filter(period=SalesRollup.PERIOD_DAY, dimension=group_by,
+                                       bucket__gte=start, bucket__lt=end)
+            .values('key').annotate(label=Max('label'), revenue=Sum('revenue'), quantity=Sum('quantity'), n=Sum('orders'))
+            .order_by('-revenue', 'key'))
+    return [{'key': row['key'], 'label': row['label'], 'revenue': _money(row['revenue']),
+             'quantity': row['quantity'], 'orders': row['n']} for row in rows]
+
+
+def totals(start, end):
+    """Overall revenue, quantity and order count for orders placed in [start, end)"""
+    result = (SalesRollup.objects.filter(period=SalesRollup.PERIOD_DAY, dimension=SalesRollup.DIMENSION_TOTAL,
+                                         bucket__gte=start, bucket__lt=end)
+              .aggregate(revenue=Sum('revenue'), quantity=Sum('quantity'), orders=Sum('orders')))
+    return {'revenue': _money(result['revenue']), 'quantity': result['quantity'] or 0,
+            'orders': result['orders'] or 0}
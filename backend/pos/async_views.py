@@ -0,0 +1,131 @@
+"""Async versions of the polling endpoints, served under ASGI.
+
+pos.urls routes the orders list, menu, table stats and event stream here
+when POS_ASYNC_VIEWS is on (backend.asgi turns it on). GET requests query
+through Django's async ORM and the event stream waits on the event loop, so
+an idle screen holds no thread. Responses are built by the same helpers as
+pos.views, in a thread, so serializing a large payload never stalls the
+streams. Other methods are handed to the regular DRF views in pos.views,
+which run in a thread as usual.
+"""
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, status
+
+from . import menu_cache, views
+from .authentication import CachedTokenAuthentication
+from .events import broker, format_event, format_reset
+from .models import MenuItem
+from .pagination import InvalidCursor, achanges_since, akeyset_page, changes_horizon
+from .renderers import FastJSONRenderer
+from .serializers import MenuItemSerializer
+
+_renderer = FastJSONRenderer()
+_authenticator = CachedTokenAuthentication()
+
+
+def _json(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(_renderer.render(data), status=status_code, content_type=_renderer.media_type)
+
+
+def async_get(sync_view):
+    """Serve GET with the decorated coroutine and every other method with `sync_view`.
+
+    Token authentication runs first, as it would in DRF: a bad token is a 401
+    even on endpoints that allow anonymous access.
+    """
+    run_sync = sync_to_async(sync_view)
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await run_sync(request, *args, **kwargs)
+            try:
+                result = await _authenticator.aauthenticate(request)
+            except exceptions.AuthenticationFailed as e:
+                response = _json({'detail': e.detail}, status.HTTP_401_UNAUTHORIZED)
+                response['WWW-Authenticate'] = _authenticator.authenticate_header(request)
+                return response
+            if result is not None:
+                request.user = result[0]
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@async_get(views.orders_list_create)
+async def orders_list_create(request):
+    params = request.GET
+    qs = views._orders_queryset(params)
+    try:
+        mode, limit = views._orders_list_mode(params)
+        if mode == 'delta':
+            rows, cursor, has_more = await achanges_since(qs, params.get('since'), limit)
+            paging = {'cursor': cursor, 'has_more': has_more}
+        elif mode == 'page':
+            since = changes_horizon()
+            rows, next_cursor = await akeyset_page(qs, params.get('cursor'), limit)
+            paging = {'next': next_cursor, 'since': since}
+        else:
+            rows, paging = [order async for order in qs.order_by('-created_at')], None
+    except InvalidCursor as e:
+        return _json({'error': f'invalid cursor: {e}'}, status.HTTP_400_BAD_REQUEST)
+    # Rows come back with everything the serializers touch prefetched; still,
+    # serializing is CPU work that would stall every stream on the loop
+    return _json(await sync_to_async(views._orders_list_data)(rows, params.get('view') == 'compact', paging))
+
+
+@async_get(views.table_stats)
+async def table_stats(request):
+    active_orders = [order async for order in views._active_orders()]
+    status_rows = [row async for row in views._status_count_rows()]
+    return _json(await sync_to_async(views._table_stats_data)(active_orders, status_rows))
+
+
+async def _build_menu_items():
+    items = [item async for item in MenuItem.objects.filter(is_available=True).select_related('category')]
+    return await sync_to_async(lambda: MenuItemSerializer(items, many=True).data)()
+
+
+@async_get(views.menu_list)
+async def menu_list(request):
+    version = await menu_cache.aget_version()
+    etag = menu_cache.etag_for('items', version)
+    if views._etag_matches(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = _json(await menu_cache.aget_payload('items', version, _build_menu_items))
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@require_GET
+async def order_events(request):
+    """Async twin of views.order_events: streams wait on the event loop, not in a thread"""
+    after, reset = broker.resume_point(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+
+    async def stream(after):
+        deadline = time.monotonic() + settings.POS_EVENT_STREAM_TIMEOUT
+        yield f"retry: {settings.POS_EVENT_RETRY_MS}\n\n"
+        if reset:
+            yield format_reset(after)
+        while time.monotonic() < deadline:
+            events = await broker.await_events(after, settings.POS_EVENT_KEEPALIVE_SECONDS)
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for seq, kind, payload in events:
+                yield format_event(seq, kind, payload)
+                after = seq
+
+    response = StreamingHttpResponse(stream(after), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,126 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+# User fields kept in the cache; everything else is loaded lazily on access
+CACHED_USER_FIELDS = ('id', 'username', 'email', 'role', 'is_superuser', 'is_staff', 'is_active')
+# Per-user version in the shared cache; bumping it invalidates that user's entries in every process
+USER_VERSION_KEY = 'pos:auth:user:{user_id}:version'
+
+
+def get_user_version(user_id):
+    return cache.get(USER_VERSION_KEY.format(user_id=user_id))
+
+
+async def aget_user_version(user_id):
+    return await cache.aget(USER_VERSION_KEY.format(user_id=user_id))
+
+
+def bump_user_version(user_id):
+    """Invalidate `user_id`'s cached tokens in every process"""
+    cache.set(USER_VERSION_KEY.format(user_id=user_id), uuid.uuid4().hex, timeout=None)
+
+
+def _user_from_cache(values):
+    """Rebuild a user from cached values, leaving the other fields deferred"""
+    User = get_user_model()
+    by_name = dict(zip(CACHED_USER_FIELDS, values))
+    # from_db expects values in the model's concrete field order
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in by_name]
+    return User.from_db('default', names, [by_name[name] for name in names])
+
+
+class TokenCache:
+    """Bounded LRU of token key -> (expiry, user version, user field values), per process"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        """(version, values) for `key`, or None when missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, version, values = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return version, values
+
+    def set(self, key, version, values):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, version, values)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def evict(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def evict_user(self, user_id):
+        with self.lock:
+            for key in [k for k, (_, _, values) in self.entries.items() if values[0] == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(settings.POS_TOKEN_CACHE_SIZE, settings.POS_TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that remembers token -> user for POS_TOKEN_CACHE_TTL seconds.
+
+    Cache hits build the user from cached fields without touching the database;
+    they only check the user's version in the shared cache. Deleting a token
+    (logout) or saving its user bumps that version, so every process drops it.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None:
+            version, values = entry
+            if get_user_version(values[0]) == version:
+                return self._cached_credentials(key, values)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, get_user_version(user.pk), tuple(getattr(user, f) for f in CACHED_USER_FIELDS))
+        return user, token
+
+    def _cached_credentials(self, key, values):
+        user = _user_from_cache(values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        # request.auth is a Token on hits as on misses, built from the cached key
+        return user, self.get_model()(key=key, user=user)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views: cache hits stay on the event loop, misses go to a thread"""
+        auth = get_authorization_header(request).split()
+        if len(auth) == 2 and auth[0].lower() == self.keyword.lower().encode():
+            try:
+                key = auth[1].decode()
+            except UnicodeError:
+                key = None
+            entry = token_cache.get(key) if key else None
+            if entry is not None:
+                version, values = entry
+                if await aget_user_version(values[0]) == version:
+                    return self._cached_credentials(key, values)
+        return await sync_to_async(self.authenticate)(request)
@@ -0,0 +1,153 @@
+"""Helpers shared by the benchmark management commands.
+
+Seeded rows are tagged with a guest-name prefix so they can be removed
+again without touching real orders.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import MenuItem, Order, OrderItem, User
+
+SEED_PREFIX = 'bench-'
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples) + 0.5)) - 1))
+    return samples[rank]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    ordered = sorted(s * 1000 for s in samples)
+    return {
+        'count': len(ordered),
+        'mean': statistics.fmean(ordered) if ordered else 0.0,
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+    }
+
+
+def time_call(fn, repeat):
+    """Run fn() `repeat` times; returns (durations, queries of the last run, last result)"""
+    durations = []
+    result = None
+    queries = 0
+    for _ in range(repeat):
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            result = fn()
+            durations.append(time.perf_counter() - start)
+        queries = len(ctx.captured_queries)
+    return durations, queries, result
+
+
+def format_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) if rows else len(str(h)) for i, h in enumerate(headers)]
+    lines = ['  '.join(str(h).ljust(w) for h, w in zip(headers, widths))]
+    lines.append('  '.join('-' * w for w in widths))
+    for row in rows:
+        lines.append('  '.join(str(c).ljust(w) for c, w in zip(row, widths)))
+    return '\n'.join(lines)
+
+
+def seed_orders(count, closed_ratio=0.95, days=365, max_items=4, batch_size=2000, rng=None):
+    """Bulk insert `count` orders spread over the last `days` days.
+
+    Most orders are closed, like a restaurant's real history; the rest are
+    spread over the open statuses.
+    """
+    rng = rng or random.Random(42)
+    menu = list(MenuItem.objects.values_list('id', 'price'))
+    if not menu:
+        raise ValueError('No menu items - run populate_menu first')
+    waiters = list(User.objects.filter(role=User.ROLE_WAITER).values_list('id', flat=True)) or [None]
+    open_statuses = [s for s, _ in Order.STATUS_CHOICES if s != Order.STATUS_CLOSED]
+    now = timezone.now()
+
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        orders, lines = [], []
+        for i in range(size):
+            closed = rng.random() < closed_ratio
+            when = now - timedelta(seconds=rng.randint(0, days * 86400)) if closed else now - timedelta(minutes=rng.randint(0, 180))
+            picks = [(rng.choice(menu), rng.randint(1, 3)) for _ in range(rng.randint(1, max_items))]
+            orders.append(Order(
+                guest_name=f'{SEED_PREFIX}{created + i}',
+                table_number=str(rng.randint(1, 40)),
+                waiter_id=rng.choice(waiters),
+                status=Order.STATUS_CLOSED if closed else rng.choice(open_statuses),
+                total=sum((Decimal(price) * qty for (_, price), qty in picks), Decimal('0')),
+                item_count=sum(qty for _, qty in picks),
+                created_at=when,
+                updated_at=when,
+            ))
+            lines.append(picks)
+        with transaction.atomic(), _raw_timestamps():
+            Order.objects.bulk_create(orders, batch_size=batch_size)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, menu_item_id=menu_id, quantity=qty, unit_price=price)
+                for order, picks in zip(orders, lines)
+                for (menu_id, price), qty in picks
+            ], batch_size=batch_size)
+        created += size
+    return created
+
+
+DISH_WORDS = {
+    'style': ['Tandoori', 'Malai', 'Achari', 'Kadai', 'Hyderabadi', 'Lucknowi', 'Amritsari', 'Goan', 'Kashmiri',
+              'Chettinad', 'Afghani', 'Peshawari', 'Dum', 'Masala', 'Butter', 'Garlic', 'Smoked', 'Crispy'],
+    'main': ['Paneer', 'Chicken', 'Lamb', 'Prawn', 'Fish', 'Mushroom', 'Aloo', 'Gobi', 'Dal', 'Chana', 'Bhindi',
+             'Palak', 'Mutton', 'Egg', 'Soya', 'Corn', 'Baingan', 'Rajma'],
+    'dish': ['Tikka', 'Curry', 'Biryani', 'Kebab', 'Korma', 'Masala', 'Pulao', 'Roll', 'Handi', 'Makhani',
+             'Do Pyaza', 'Bhuna', 'Vindaloo', 'Saag', 'Fry', 'Kathi', 'Thali', 'Tawa'],
+}
+
+
+def synthetic_menu(count, categories=200, rng=None):
+    """Catalog rows (see pos.menu_import) with dish-like names, in `categories` seeded categories"""
+    rng = rng or random.Random(42)
+    spice_levels = ['', 'mild', 'medium', 'hot', 'very_hot']
+    for i in range(count):
+        name = ' '.join(rng.choice(DISH_WORDS[part]) for part in ('style', 'main', 'dish'))
+        yield {
+            'category': f'{SEED_PREFIX}outlet-{i % categories}',
+            'name': f'{name} {i // len(DISH_WORDS["dish"])}',
+            'price': rng.randint(50, 2500),
+            'description': f'Synthetic {name.lower()}',
+            'is_vegetarian': rng.random() < 0.5,
+            'is_vegan': rng.random() < 0.1,
+            'spice_level': rng.choice(spice_levels),
+        }
+
+
+def remove_seeded():
+    seeded = Order.objects.filter(guest_name__startswith=SEED_PREFIX)
+    OrderItem.objects.filter(order__in=seeded).delete()
+    return seeded.delete()[0]
+
+
+class _raw_timestamps:
+    """Let bulk_create keep explicit created_at/updated_at values"""
+
+    def __enter__(self):
+        self.fields = [Order._meta.get_field('created_at'), Order._meta.get_field('updated_at')]
+        self.saved = [(f.auto_now, f.auto_now_add) for f in self.fields]
+        for f in self.fields:
+            f.auto_now = f.auto_now_add = False
+
+    def __exit__(self, *exc):
+        for f, (auto_now, auto_now_add) in zip(self.fields, self.saved):
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
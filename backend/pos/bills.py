@@ -0,0 +1,162 @@
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from reportlab.pdfgen import canvas
+
+from .models import BillJob
+from .serializers import OrderSerializer, orders_with_items
+
+logger = logging.getLogger(__name__)
+
+# Bump when the PDF layout changes so previously cached bills are not reused
+RENDERER_VERSION = 1
+PDF_CACHE_KEY = 'pos:bill:pdf:{digest}'
+PDF_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def bill_lines(order, data):
+    """Plain-text bill lines for a serialized order"""
+    lines = [f"Order #{order.id}", f"Guest: {order.guest_name}", f"Table: {order.table_number}", 'Items:']
+    for it in data['items']:
+        lines.append(f" - {it['quantity']} x {it['menu_item']['name']} @ {it['unit_price']} = {float(it['unit_price']) * it['quantity']}")
+    lines.append(f"Total: {data['total']}")
+    return lines
+
+
+def render_pdf(order, lines):
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    y = 800
+    p.setFont('Helvetica-Bold', 16)
+    p.drawString(50, y, f"Invoice - Order #{order.id}")
+    y -= 40
+    p.setFont('Helvetica', 12)
+    for line in lines:
+        p.drawString(50, y, line)
+        y -= 20
+        if y < 60:
+            p.showPage()
+            y = 800
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def bill_digest(order, lines):
+    """Content hash of everything that ends up on the bill, plus the order status"""
+    content = '\n'.join([f'v{RENDERER_VERSION}', order.status, *lines])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def cached_pdf(digest):
+    return cache.get(PDF_CACHE_KEY.format(digest=digest))
+
+
+def render_pdf_cached(order, lines):
+    """Returns (digest, pdf bytes), rendering only when the bill content is new"""
+    digest = bill_digest(order, lines)
+    pdf_data = cached_pdf(digest)
+    if pdf_data is None:
+        pdf_data = render_pdf(order, lines)
+        cache.set(PDF_CACHE_KEY.format(digest=digest), pdf_data, timeout=PDF_CACHE_TIMEOUT)
+    return digest, pdf_data
+
+
+def enqueue(order, kind, email=''):
+    """Queue a bill job"""
+    return BillJob.objects.create(order=order, kind=kind, email=email, max_attempts=settings.POS_BILL_JOB_MAX_ATTEMPTS)
+
+
+def claim_next():
+    """Atomically move the next due job to running; None when the queue is empty"""
+    now = timezone.now()
+    due = (BillJob.objects.filter(status=BillJob.STATUS_QUEUED, run_after__lte=now)
+           .order_by('run_after', 'id').values_list('pk', flat=True)[:10])
+    for pk in due:
+        claimed = BillJob.objects.filter(pk=pk, status=BillJob.STATUS_QUEUED).update(
+            status=BillJob.STATUS_RUNNING, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if claimed:
+            return BillJob.objects.select_related('order').get(pk=pk)
+    return None
+
+
+def requeue_stale(max_age):
+    """Requeue jobs left running by a worker that died mid-job"""
+    cutoff = timezone.now() - max_age
+    return BillJob.objects.filter(status=BillJob.STATUS_RUNNING, updated_at__lt=cutoff).update(
+        status=BillJob.STATUS_QUEUED, updated_at=timezone.now(),
+    )
+
+
+def perform(job):
+    order = orders_with_items().get(pk=job.order_id)
+    lines = bill_lines(order, OrderSerializer(order).data)
+    _, pdf_data = render_pdf_cached(order, lines)
+    if job.kind == BillJob.KIND_EMAIL:
+        email = EmailMessage(subject=f'Your bill for Order #{order.id}', body='\n'.join(lines),
+                             from_email=settings.DEFAULT_FROM_EMAIL, to=[job.email])
+        email.attach(f'Order_{order.id}.pdf', pdf_data, 'application/pdf')
+        email.send()
+    return pdf_data
+
+
+def run(job):
+    """Run a claimed job, scheduling a retry with exponential backoff on failure"""
+    try:
+        perform(job)
+    except Exception as e:
+        logger.warning('Bill job %s failed (attempt %s): %s', job.id, job.attempts, e)
+        job.last_error = str(e)
+        if job.attempts >= job.max_attempts:
+            job.status = BillJob.STATUS_FAILED
+        else:
+            job.status = BillJob.STATUS_QUEUED
+            delay = settings.POS_BILL_JOB_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+        job.save(update_fields=['status', 'last_error', 'run_after', 'updated_at'])
+        return job
+    # The PDF stays in the bill cache only, where /bill/pdf/ serves it from
+    job.status = BillJob.STATUS_DONE
+    job.last_error = ''
+    job.save(update_fields=['status', 'last_error', 'updated_at'])
+    return job
+
+
+def work(stop, poll_interval, drain=False):
+    """Worker loop for one thread: claim and run jobs until `stop` is set,
+    or until the queue is empty when `drain` is true"""
+    while not stop.is_set():
+        close_old_connections()
+        job = claim_next()
+        if job is None:
+            if drain:
+                break
+            stop.wait(poll_interval)
+            continue
+        run(job)
+    close_old_connections()
+
+
+def run_workers(stop, concurrency, poll_interval, drain=False):
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bill-worker') as pool:
+        futures = [pool.submit(work, stop, poll_interval, drain) for _ in range(concurrency)]
+        try:
+            for future in futures:
+                while not stop.is_set():
+                    try:
+                        future.result(timeout=0.5)
+                        break
+                    except TimeoutError:
+                        continue
+        finally:
+            stop.set()
@@ -0,0 +1,88 @@
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript')
+
+
+def _accepted_encodings(header):
+    """Codings in an Accept-Encoding header that are not refused with q=0 (`*` stands for the rest)"""
+    weights = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    wildcard = weights.get('*', 0.0)
+    return {coding for coding in ('br', 'gzip') if weights.get(coding, wildcard) > 0}
+
+
+class CompressionMiddleware:
+    """Brotli/gzip response compression above POS_COMPRESS_MIN_BYTES.
+
+    Unlike django.middleware.gzip.GZipMiddleware it leaves streaming responses
+    (the SSE event stream) alone and only compresses text-like content types.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = settings.POS_COMPRESS_MIN_BYTES
+        self.level = settings.POS_COMPRESS_LEVEL
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if response.streaming or not 200 <= response.status_code < 300 or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.min_bytes:
+            return response
+
+        offered = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        if brotli is not None and 'br' in offered:
+            encoding, body = 'br', brotli.compress(response.content, quality=min(self.level, 11))
+        elif 'gzip' in offered:
+            encoding, body = 'gzip', gzip.compress(response.content, compresslevel=min(self.level, 9), mtime=0)
+        else:
+            return response
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        # The compressed body is a different representation: weaken any strong ETag
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        return response
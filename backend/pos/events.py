@@ -0,0 +1,149 @@
+import asyncio
+import collections
+import json
+import threading
+import uuid
+
+
+class EventBroker:
+    """In-process pub/sub for order events.
+
+    Keeps a short history so reconnecting clients can resume from the
+    Last-Event-ID they saw. Only reaches streams served by the same process,
+    so run the event stream in a single process (threaded or ASGI worker).
+    Event ids are "<epoch>-<seq>": the epoch changes when the process
+    restarts and the sequence starts over, so stale ids are recognised.
+    """
+
+    def __init__(self, history=256):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._cond = threading.Condition()
+        self._events = collections.deque(maxlen=history)
+        self._seq = 0
+        # (event loop, asyncio.Event) for each stream waiting in await_events()
+        self._async_waiters = set()
+
+    @property
+    def last_id(self):
+        return self._seq
+
+    def publish(self, kind, payload):
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, kind, payload))
+            self._cond.notify_all()
+            for loop, event in self._async_waiters:
+                loop.call_soon_threadsafe(event.set)
+
+    def resume_point(self, last_event_id):
+        """(sequence to stream after, whether the client must reload) for a Last-Event-ID.
+
+        No id means a new client, which only needs events from now on. An id
+        from another epoch, past the current sequence or older than the
+        history means events were missed: the client is told to reload. A
+        malformed id replays the history from the start.
+        """
+        if last_event_id is None:
+            return self.last_id, False
+        epoch, separator, seq = str(last_event_id).rpartition('-')
+        if not separator or not seq.isdigit():
+            after = 0
+        else:
+            after = int(seq) if epoch == self.epoch else None
+        with self._cond:
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            if after is None or after > self._seq or after < oldest - 1:
+                return self._seq, True
+            return after, False
+
+    def wait(self, after, timeout):
+        """Events newer than `after`, blocking up to `timeout` seconds for one"""
+        with self._cond:
+            if self._seq <= after:
+                self._cond.wait(timeout)
+            return [e for e in self._events if e[0] > after]
+
+    async def await_events(self, after, timeout):
+        """wait() for async streams: waits on the event loop instead of holding a thread"""
+        loop = asyncio.get_running_loop()
+        waiter = (loop, asyncio.Event())
+        with self._cond:
+            if self._seq > after:
+                return [e for e in self._events if e[0] > after]
+            self._async_waiters.add(waiter)
+        # A timer rather than asyncio.wait_for(), which can swallow the
+        # cancellation of a stream whose client disconnects
+        timer = loop.call_later(timeout, waiter[1].set)
+        try:
+            await waiter[1].wait()
+        finally:
+            timer.cancel()
+            with self._cond:
+                self._async_waiters.discard(waiter)
+        with self._cond:
+            return [e for e in self._events if e[0] > after]
+
+
+class StreamLimit:
+    """Caps how many event streams a threaded (WSGI) worker serves at once.
+
+    Each open stream holds a worker thread until it times out, so without a
+    cap a room full of screens leaves no threads for ordinary requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+
+    def hold(self, stream, limit):
+        """`stream` wrapped to hold a slot until closed, or None if `limit` streams are open (0: no limit)"""
+        with self._lock:
+            if limit and self.open >= limit:
+                return None
+            self.open += 1
+        return _HeldStream(stream, self._release)
+
+    def _release(self):
+        with self._lock:
+            self.open -= 1
+
+
+class _HeldStream:
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        return iter(self._stream)
+
+    def close(self):
+        # The server closes the response once, however the stream ended
+        release, self._release = self._release, None
+        if release:
+            self._stream.close()
+            release()
+
+
+broker = EventBroker()
+stream_limit = StreamLimit()
+
+
+def publish_order(kind, order):
+    broker.publish(kind, {
+        'id': order.id,
+        'status': order.status,
+        'table_number': order.table_number,
+    })
+
+
+def publish_status(order_id, status):
+    broker.publish('order_status', {'id': order_id, 'status': status})
+
+
+def format_event(seq, kind, payload):
+    return f"id: {broker.epoch}-{seq}\nevent: {kind}\ndata: {json.dumps(payload)}\n\n"
+
+
+def format_reset(seq):
+    """Tells a client that resumed from an unknown position to reload everything"""
+    return format_event(seq, 'reset', {})
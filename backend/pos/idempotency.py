@@ -0,0 +1,75 @@
+"""Idempotent request handling for order submission.
+
+The first request with a given (user, Idempotency-Key) runs and its
+response is stored in the same transaction as the order it created;
+retries within POS_IDEMPOTENCY_KEY_TTL get that response back instead of
+creating another order. A key reused with a different body is rejected.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+STATUS_KEY_MISMATCH = 422
+STATUS_IN_PROGRESS = 409
+
+
+def request_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def cutoff():
+    return timezone.now() - timedelta(seconds=settings.POS_IDEMPOTENCY_KEY_TTL)
+
+
+def _replay(record, digest):
+    """(status_code, data, replayed) for a request whose key is already stored"""
+    if record.request_hash != digest:
+        return STATUS_KEY_MISMATCH, {'error': 'Idempotency-Key was already used for a different request'}, False
+    if not record.status_code:
+        return STATUS_IN_PROGRESS, {'error': 'a request with this Idempotency-Key is in progress'}, False
+    return record.status_code, record.response, True
+
+
+def lookup(user, keys):
+    """{key: IdempotencyKey} for the unexpired keys among `keys`"""
+    return {record.key: record
+            for record in IdempotencyKey.objects.filter(user=user, key__in=keys, created_at__gte=cutoff())}
+
+
+def run_once(user, key, data, action, existing=None):
+    """Run `action()` -> (status_code, data) once per (user, key); returns (status_code, data, replayed).
+
+    `existing` is an already looked-up record (see lookup) to save a query.
+    """
+    digest = request_hash(data)
+    if existing is None:
+        existing = IdempotencyKey.objects.filter(user=user, key=key, created_at__gte=cutoff()).first()
+    if existing is not None:
+        return _replay(existing, digest)
+
+    try:
+        with transaction.atomic():
+            # An expired record for the key is replaced
+            IdempotencyKey.objects.filter(user=user, key=key, created_at__lt=cutoff()).delete()
+            # Claims the key; a concurrent request with the same key waits here and then fails
+            record = IdempotencyKey.objects.create(user=user, key=key, request_hash=digest)
+            status_code, response = action()
+            record.status_code, record.response = status_code, response
+            record.save(update_fields=['status_code', 'response'])
+    except IntegrityError:
+        existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if existing is None:
+            raise
+        return _replay(existing, digest)
+    return status_code, response, False
+
+
+def purge_expired():
+    return IdempotencyKey.objects.filter(created_at__lt=cutoff()).delete()[0]
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from pos.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = 'Move closed orders older than N days (by close time) into the archive tables, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Archive orders closed more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many orders would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--days must be >= 0 and --batch-size >= 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        candidates = Order.objects.filter(status=Order.STATUS_CLOSED, updated_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} closed orders older than {options["days"]} days would be archived')
+            return
+
+        archived = 0
+        while True:
+            with transaction.atomic():
+                pks = list(candidates.order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+                if not pks:
+                    break
+                archived += self.archive_batch(pks)
+            self.stdout.write(f'  Archived {archived} orders...')
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} orders closed before {cutoff:%Y-%m-%d %H:%M}'))
+
+    def archive_batch(self, pks):
+        orders = Order.objects.filter(pk__in=pks).values(
+            'id', 'guest_name', 'table_number', 'waiter_id', 'status', 'created_at', 'updated_at', 'total', 'item_count')
+        items = OrderItem.objects.filter(order_id__in=pks).values(
+            'id', 'order_id', 'menu_item_id', 'menu_item__name', 'quantity', 'unit_price')
+
+        ArchivedOrder.objects.bulk_create([ArchivedOrder(**order) for order in orders])
+        ArchivedOrderItem.objects.bulk_create([
+            ArchivedOrderItem(id=item['id'], order_id=item['order_id'], menu_item_id=item['menu_item_id'],
+                              menu_item_name=item['menu_item__name'], quantity=item['quantity'],
+                              unit_price=item['unit_price'])
+            for item in items
+        ])
+        OrderItem.objects.filter(order_id__in=pks).delete()
+        Order.objects.filter(pk__in=pks).delete()
+        return len(pks)
@@ -0,0 +1,204 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from pos import benchmarking
+from pos.models import MenuItem, Order
+
+# Credentials created by populate_menu
+ROLE_LOGINS = {
+    'waiter': [('waiter1', 'waiter123'), ('waiter2', 'waiter123')],
+    'chef': [('chef1', 'chef123')],
+    'reception': [('reception1', 'reception123')],
+}
+
+
+class InProcessClient:
+    """Drives the URL routes through Django's test client, counting queries"""
+    counts_queries = True
+
+    def __init__(self):
+        self.client = Client()
+        self.token = None
+
+    def request(self, method, path, data=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {self.token}'} if self.token else {}
+        with CaptureQueriesContext(connection) as ctx:
+            if method == 'GET':
+                response = self.client.get(path, **headers)
+            else:
+                response = self.client.post(path, json.dumps(data or {}), content_type='application/json', **headers)
+            body = response.json() if response.get('Content-Type', '').startswith('application/json') else None
+        return response.status_code, body, len(ctx.captured_queries)
+
+
+class HttpClient:
+    """Drives a running server over HTTP (query counts are not available)"""
+    counts_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.token = None
+
+    def request(self, method, path, data=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        body = json.dumps(data).encode('utf-8') if method == 'POST' else None
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                status, raw, ctype = response.status, response.read(), response.headers.get('Content-Type', '')
+        except urllib.error.HTTPError as e:
+            status, raw, ctype = e.code, e.read(), e.headers.get('Content-Type', '')
+        return status, json.loads(raw) if raw and ctype.startswith('application/json') else None, None
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, client, label, method, path, data=None, ok=(200, 201, 202, 304)):
+        start = time.perf_counter()
+        try:
+            status, body, queries = client.request(method, path, data)
+        except Exception:
+            status, body, queries = None, None, None
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples[label].append(elapsed)
+            if queries is not None:
+                self.queries[label].append(queries)
+            if status not in ok:
+                self.errors[label] += 1
+        return status, body
+
+
+class Command(BaseCommand):
+    help = ('Load-test the POS API with concurrent waiter, kitchen and reception screens and report '
+            'latency percentiles, throughput and query counts per endpoint')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--waiters', type=int, default=4, help='Concurrent waiter tablets')
+        parser.add_argument('--kitchen', type=int, default=2, help='Concurrent kitchen screens')
+        parser.add_argument('--reception', type=int, default=2, help='Concurrent reception screens')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run the load')
+        parser.add_argument('--history', type=int, default=5000, help='Historical orders to seed first')
+        parser.add_argument('--base-url', help='Drive a running server (e.g. http://127.0.0.1:8000) '
+                                               'instead of calling the views in-process')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--keep', action='store_true', help='Keep seeded and benchmark-created orders')
+
+    def handle(self, *args, **options):
+        if not MenuItem.objects.exists():
+            call_command('populate_menu', stdout=self.stdout)
+        seeded = Order.objects.filter(guest_name__startswith=benchmarking.SEED_PREFIX).count()
+        if seeded < options['history']:
+            self.stdout.write(f'Seeding {options["history"] - seeded} historical orders...')
+            benchmarking.seed_orders(options['history'] - seeded)
+
+        base_url = options['base_url']
+        make_client = (lambda: HttpClient(base_url)) if base_url else InProcessClient
+        recorder = Recorder()
+        deadline = time.monotonic() + options['duration']
+        rng = random.Random(options['seed'])
+
+        screens = ([('waiter', self.waiter)] * options['waiters'] + [('chef', self.kitchen)] * options['kitchen']
+                   + [('reception', self.reception)] * options['reception'])
+        if not screens:
+            raise CommandError('Nothing to run: give at least one waiter, kitchen or reception screen')
+
+        threads = []
+        for n, (role, loop) in enumerate(screens):
+            username, password = ROLE_LOGINS[role][n % len(ROLE_LOGINS[role])]
+            args = (make_client(), recorder, deadline, random.Random(rng.random()), username, password)
+            threads.append(threading.Thread(target=self.screen, args=(loop, *args), daemon=True))
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        if not options['keep']:
+            removed = benchmarking.remove_seeded()
+            self.stdout.write(f'Removed {removed} benchmark orders')
+        self.report(recorder, elapsed, len(screens), base_url)
+
+    def screen(self, loop, client, recorder, deadline, rng, username, password):
+        try:
+            status, body = recorder.call(client, 'login', 'POST', '/api/auth/login/',
+                                         {'username': username, 'password': password})
+            if status != 200:
+                return
+            client.token = body['token']
+            while time.monotonic() < deadline:
+                loop(client, recorder, rng)
+        finally:
+            close_old_connections()
+
+    def waiter(self, client, recorder, rng):
+        status, menu = recorder.call(client, 'menu', 'GET', '/api/menu/')
+        if not menu:
+            return
+        items = [{'menu_item_id': item['id'], 'quantity': rng.randint(1, 3)}
+                 for item in rng.sample(menu, k=min(len(menu), rng.randint(1, 8)))]
+        recorder.call(client, 'order create', 'POST', '/api/orders/', {
+            'guest_name': f'{benchmarking.SEED_PREFIX}live',
+            'table_number': str(rng.randint(1, 40)),
+            'items': items,
+        })
+        time.sleep(rng.uniform(0.2, 1.0))
+
+    def kitchen(self, client, recorder, rng):
+        status, orders = recorder.call(client, 'orders list', 'GET', '/api/orders/?limit=50')
+        for order in (orders or {}).get('results', []):
+            nxt = {'accepted': 'preparing', 'preparing': 'ready', 'ready': 'served'}.get(order['status'])
+            if nxt:
+                recorder.call(client, 'status change', 'POST', f'/api/orders/{order["id"]}/status/',
+                              {'status': nxt}, ok=(200, 409))
+                break
+        time.sleep(rng.uniform(0.1, 0.5))
+
+    def reception(self, client, recorder, rng):
+        recorder.call(client, 'table stats', 'GET', '/api/tables/stats/')
+        status, orders = recorder.call(client, 'orders list', 'GET', '/api/orders/?limit=50')
+        for order in (orders or {}).get('results', []):
+            nxt = {'pending': 'accepted', 'served': 'closed'}.get(order['status'])
+            if nxt:
+                if nxt == 'closed':
+                    recorder.call(client, 'bill', 'GET', f'/api/orders/{order["id"]}/bill/')
+                recorder.call(client, 'status change', 'POST', f'/api/orders/{order["id"]}/status/',
+                              {'status': nxt}, ok=(200, 409))
+                break
+        time.sleep(rng.uniform(0.1, 0.5))
+
+    def report(self, recorder, elapsed, screens, base_url):
+        rows = []
+        for label in sorted(recorder.samples):
+            samples = recorder.samples[label]
+            summary = benchmarking.summarize(samples)
+            queries = recorder.queries.get(label)
+            rows.append([
+                label, summary['count'], f'{summary["count"] / elapsed:.1f}',
+                f'{summary["p50"]:.1f}', f'{summary["p95"]:.1f}', f'{summary["p99"]:.1f}',
+                f'{sum(queries) / len(queries):.1f}' if queries else '-',
+                recorder.errors.get(label, 0),
+            ])
+        total = sum(len(s) for s in recorder.samples.values())
+        target = base_url or f'in-process ({connection.vendor})'
+        self.stdout.write(f'\n{target}: {screens} screens, {elapsed:.1f}s, {total / elapsed:.1f} req/s overall (latency in ms)')
+        self.stdout.write(benchmarking.format_table(
+            ['endpoint', 'requests', 'req/s', 'p50', 'p95', 'p99', 'queries', 'errors'], rows))
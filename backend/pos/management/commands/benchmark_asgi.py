@@ -0,0 +1,283 @@
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.utils import timezone
+from pos import benchmarking
+from pos.events import publish_status
+from pos.models import Order, User
+from pos.pagination import encode_cursor
+from rest_framework.authtoken.models import Token
+
+# What one screen (kitchen display, reception dashboard) polls, in turn
+POLL_PATHS = ['/api/orders/?since={cursor}&view=compact', '/api/tables/stats/', '/api/menu/']
+
+
+class Command(BaseCommand):
+    help = ('Compare how many concurrent screens (an open event stream plus polling) the WSGI '
+            'deployment (gthread worker) and the ASGI deployment (async views) can serve')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--screens', default='10,25,50,100', help='Comma-separated screen counts to try')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls of one screen')
+        parser.add_argument('--threads', type=int, default=32, help='WSGI worker threads (gunicorn --threads)')
+        parser.add_argument('--orders', type=int, default=2000, help='Orders to seed')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded orders afterwards')
+        # Internal: run one deployment in this process and print the results as JSON
+        parser.add_argument('--run', choices=['wsgi', 'asgi'], help='Benchmark a single deployment (used internally)')
+
+    def handle(self, *args, **options):
+        screens = [int(n) for n in options['screens'].split(',')]
+        if options['run']:
+            results = [run_screens(options['run'], n, options) for n in screens]
+            self.stdout.write(json.dumps(results))
+            return
+
+        user = User.objects.filter(role=User.ROLE_RECEPTION).first()
+        if user is None:
+            raise CommandError('No reception user - run populate_menu first')
+        seeded = Order.objects.filter(guest_name__startswith=benchmarking.SEED_PREFIX).count()
+        if seeded < options['orders']:
+            self.stdout.write(f'Seeding {options["orders"] - seeded} orders...')
+            benchmarking.seed_orders(options['orders'] - seeded, closed_ratio=0.98)
+
+        try:
+            rows = []
+            for mode in ('wsgi', 'asgi'):
+                # Each deployment runs in its own process: the URLconf picks the views at import time
+                for result in self.run_child(mode, options):
+                    stats = result['latency']
+                    rows.append([
+                        'WSGI gthread' if mode == 'wsgi' else 'ASGI async views', result['screens'],
+                        f'{result["streams"]}/{result["screens"]}', result['polls'], f'{result["polls_per_s"]:.0f}',
+                        f'{stats["p50"]:.1f}', f'{stats["p95"]:.1f}', f'{stats["p99"]:.1f}', result['late'],
+                    ])
+            self.stdout.write(f'\n{connection.vendor}, {options["duration"]:g}s per run, one poll per screen every '
+                              f'{options["interval"]:g}s, {options["threads"]} WSGI threads')
+            self.stdout.write(benchmarking.format_table(
+                ['deployment', 'screens', 'streams open', 'polls', 'polls/s', 'p50 ms', 'p95 ms', 'p99 ms',
+                 'polls > 1s'], rows))
+        finally:
+            if not options['keep']:
+                self.stdout.write(f'Removed {benchmarking.remove_seeded()} seeded rows')
+
+    def run_child(self, mode, options):
+        env = dict(os.environ, POS_ASYNC_VIEWS='1' if mode == 'asgi' else '0', POS_EVENT_KEEPALIVE_SECONDS='1',
+                   PYTHONPATH=os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get('PYTHONPATH')])))
+        env.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'))
+        args = [sys.executable, '-m', 'django', 'benchmark_asgi', '--run', mode, '--screens', options['screens'],
+                '--duration', str(options['duration']), '--interval', str(options['interval']),
+                '--threads', str(options['threads'])]
+        self.stdout.write(f'Running {mode.upper()} ({options["screens"]} screens)...')
+        proc = subprocess.run(args, env=env, capture_output=True, text=True)
+        if proc.returncode:
+            raise CommandError(f'{mode} run failed:\n{proc.stderr}')
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_screens(mode, screens, options):
+    """Hold one event stream open per screen and poll from each; returns a results dict"""
+    token, _ = Token.objects.get_or_create(user=User.objects.filter(role=User.ROLE_RECEPTION).first())
+    open_ids = list(Order.objects.exclude(status=Order.STATUS_CLOSED).values_list('id', flat=True))
+    close_old_connections()
+    run = Run(screens, options['duration'], options['interval'], token.key)
+    stop_writer = threading.Event()
+    writer = threading.Thread(target=run.write, args=(open_ids, stop_writer))
+    writer.start()
+    try:
+        if mode == 'wsgi':
+            run.wsgi(options['threads'])
+        else:
+            asyncio.run(run.asgi())
+    finally:
+        stop_writer.set()
+        writer.join()
+    return run.results()
+
+
+class Run:
+    def __init__(self, screens, duration, interval, token):
+        self.screens = screens
+        self.duration = duration
+        self.interval = interval
+        self.token = token
+        self.lock = threading.Lock()
+        self.samples = []
+        self.streams = 0
+        # Spreads the screens' polls over the interval
+        self.rng = random.Random(screens)
+        self.started = time.monotonic()
+        self.deadline = self.started + duration
+        # Screens start polling for changes from now on
+        self.cursor = encode_cursor(timezone.now(), 0)
+
+    def record(self, elapsed):
+        with self.lock:
+            self.samples.append(elapsed)
+
+    def stream_opened(self):
+        with self.lock:
+            self.streams += 1
+
+    def write(self, order_ids, stop):
+        """Touch an open order every 100ms, so streams get events and polls get deltas"""
+        rng = random.Random(1)
+        try:
+            while order_ids and not stop.wait(0.1):
+                order = Order.objects.get(pk=rng.choice(order_ids))
+                order.save(update_fields=['updated_at'])
+                publish_status(order.id, order.status)
+        finally:
+            connection.close()
+
+    def results(self):
+        return {
+            'screens': self.screens,
+            'streams': self.streams,
+            'polls': len(self.samples),
+            'polls_per_s': len(self.samples) / self.duration,
+            'latency': benchmarking.summarize(self.samples),
+            'late': sum(1 for s in self.samples if s > 1.0),
+        }
+
+    # WSGI: one gthread worker, i.e. a fixed pool of threads that each serve one request at a time
+
+    def wsgi(self, threads):
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.test import RequestFactory
+
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        headers = {'HTTP_AUTHORIZATION': f'Token {self.token}'}
+
+        def serve(path, stream=False):
+            if time.monotonic() >= self.deadline:
+                return b''
+            try:
+                response = handler(factory.get(path, **headers).environ, lambda status, response_headers: None)
+                if stream:
+                    # An event stream keeps its worker thread until the client goes away
+                    self.stream_opened()
+                    for _ in response:
+                        if time.monotonic() >= self.deadline:
+                            break
+                    body = b''
+                else:
+                    body = b''.join(response)
+                response.close()
+                return body
+            finally:
+                if stream:
+                    connection.close()
+
+        def screen(pool):
+            pool.submit(serve, '/api/events/', stream=True)
+            cursor = self.cursor
+            for i, at in self.schedule():
+                time.sleep(max(0.0, at - time.monotonic()))
+                path = POLL_PATHS[i % len(POLL_PATHS)].format(cursor=cursor)
+                start = time.monotonic()
+                future = pool.submit(serve, path)
+                try:
+                    body = future.result(timeout=max(0.0, self.deadline - start))
+                except TimeoutError:
+                    # Still queued behind the streams when the run ended
+                    future.cancel()
+                    return
+                self.record(time.monotonic() - start)
+                cursor = _next_cursor(path, body, cursor)
+
+        pool = ThreadPoolExecutor(threads)
+        try:
+            clients = [threading.Thread(target=screen, args=(pool,)) for _ in range(self.screens)]
+            for t in clients:
+                t.start()
+            for t in clients:
+                t.join()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def schedule(self):
+        """(poll number, monotonic time) of one screen's polls, --interval apart, until the run ends"""
+        with self.lock:
+            at = self.started + self.rng.random() * self.interval
+        i = 0
+        while at < self.deadline:
+            yield i, at
+            i += 1
+            at += self.interval
+
+    # ASGI: every request is a task on one event loop, as under a uvicorn worker
+
+    async def asgi(self):
+        from django.core.asgi import get_asgi_application
+
+        # Connections opened in per-request threads are not reused under ASGI
+        connections.settings['default']['CONN_MAX_AGE'] = 0
+        app = get_asgi_application()
+        headers = [(b'authorization', f'Token {self.token}'.encode()), (b'host', b'localhost')]
+
+        async def serve(path, stream=False):
+            url = urlsplit(path)
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': url.path, 'raw_path': url.path.encode(), 'query_string': url.query.encode(),
+                'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            requested = False
+            chunks = []
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # The client disconnects from streams when the run ends
+                await asyncio.sleep(max(0.0, self.deadline - time.monotonic()) if stream else 3600)
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start' and stream:
+                    self.stream_opened()
+                elif message['type'] == 'http.response.body' and not stream:
+                    chunks.append(message.get('body', b''))
+
+            await app(scope, receive, send)
+            return b''.join(chunks)
+
+        async def screen():
+            stream = asyncio.create_task(serve('/api/events/', stream=True))
+            cursor = self.cursor
+            for i, at in self.schedule():
+                await asyncio.sleep(max(0.0, at - time.monotonic()))
+                path = POLL_PATHS[i % len(POLL_PATHS)].format(cursor=cursor)
+                start = time.monotonic()
+                try:
+                    body = await asyncio.wait_for(serve(path), max(0.0, self.deadline - start))
+                except asyncio.TimeoutError:
+                    break
+                self.record(time.monotonic() - start)
+                cursor = _next_cursor(path, body, cursor)
+            await stream
+
+        await asyncio.gather(*(screen() for _ in range(self.screens)))
+
+
+def _next_cursor(path, body, cursor):
+    if not path.startswith('/api/orders/'):
+        return cursor
+    try:
+        return json.loads(body)['cursor'] or cursor
+    except (ValueError, KeyError):
+        return cursor
@@ -0,0 +1,100 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from pos import benchmarking
+from pos.models import User
+from rest_framework.authtoken.models import Token
+
+DEFAULT_PATHS = ['/api/menu/categories/', '/api/orders/?limit=50', '/api/tables/stats/', '/api/kitchen/orders/']
+
+
+class Command(BaseCommand):
+    help = ('Compare request latency with a new database connection per request against persistent '
+            'connections (and the psycopg pool when POS_DB_POOL=1), through the full WSGI stack')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help='Requests per mode')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent request threads')
+        parser.add_argument('--path', action='append', dest='paths', help=f'Paths to request (default: {DEFAULT_PATHS})')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(role=User.ROLE_RECEPTION).first()
+        if user is None:
+            raise CommandError('No reception user - run populate_menu first')
+        token, _ = Token.objects.get_or_create(user=user)
+        paths = options['paths'] or DEFAULT_PATHS
+
+        db = settings.DATABASES['default']
+        if db.get('OPTIONS', {}).get('pool'):
+            modes = [('psycopg pool', 0)]
+        else:
+            modes = [('new connection per request', 0), ('persistent (CONN_MAX_AGE)', 600)]
+
+        rows = []
+        for label, max_age in modes:
+            samples, opened, elapsed = self.run_mode(max_age, paths, token.key, options['requests'], options['threads'])
+            stats = benchmarking.summarize(samples)
+            rows.append([label, opened, f'{stats["p50"]:.2f}', f'{stats["p95"]:.2f}', f'{stats["p99"]:.2f}',
+                         f'{len(samples) / elapsed:.0f}'])
+
+        self.stdout.write(f'\n{connection.vendor} ({db.get("NAME")}), {options["requests"]} requests per mode, '
+                          f'{options["threads"]} threads')
+        self.stdout.write(benchmarking.format_table(
+            ['mode', 'connections opened', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s'], rows))
+        if not db.get('OPTIONS', {}).get('pool'):
+            self.stdout.write('Run with DATABASE_URL=postgres://... POS_DB_POOL=1 to measure the psycopg pool.')
+
+    def run_mode(self, max_age, paths, token, total, threads):
+        # Applies to every connection opened from now on, in every thread
+        connections.settings['default']['CONN_MAX_AGE'] = max_age
+        connection.close()
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        samples, lock, opened = [], threading.Lock(), []
+        counter = iter(range(total))
+
+        def count_connection(sender, connection, **kwargs):
+            with lock:
+                opened.append(connection)
+
+        def worker():
+            try:
+                for i in counter:
+                    environ = factory.get(paths[i % len(paths)], HTTP_AUTHORIZATION=f'Token {token}').environ
+                    start = time.perf_counter()
+                    response = handler(environ, lambda status, headers: None)
+                    b''.join(response)
+                    # Fires request_finished, which closes or keeps the connection per CONN_MAX_AGE
+                    response.close()
+                    duration = time.perf_counter() - start
+                    with lock:
+                        samples.append(duration)
+            finally:
+                connection.close()
+
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            # Connections handed out by the pool fire connection_created on every checkout;
+            # count the physical connections the pool opened instead
+            pool_opened = pool.get_stats().get('connections_num', 0)
+        connection_created.connect(count_connection)
+        try:
+            workers = [threading.Thread(target=worker) for _ in range(threads)]
+            started = time.perf_counter()
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count_connection)
+            close_old_connections()
+        if pool is not None:
+            return samples, pool.get_stats().get('connections_num', 0) - pool_opened, elapsed
+        return samples, len(opened), elapsed
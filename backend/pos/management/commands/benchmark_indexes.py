@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from pos import benchmarking
+from pos.models import Order
+
+
+class Command(BaseCommand):
+    help = ('Seed a large order history and compare list/stats latency with and without '
+            'the Order indexes on the configured database (SQLite or PostgreSQL)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100000, help='Number of orders to seed')
+        parser.add_argument('--repeat', type=int, default=10, help='Requests per endpoint and phase')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded orders afterwards')
+        parser.add_argument('--drop-indexes', action='store_true',
+                            help='Confirm that the Order indexes may be dropped (and rebuilt) on this database')
+
+    def handle(self, *args, **options):
+        # The "before" phase drops the live indexes, which would stall every
+        # order query on a database anyone else is using
+        if not options['drop_indexes']:
+            raise CommandError('This drops the Order indexes for the duration of the run; '
+                               'pass --drop-indexes to confirm, on a scratch database only')
+        if not settings.DEBUG:
+            raise CommandError('Refusing to drop indexes with DEBUG off; run against a development database')
+        seeded = Order.objects.filter(guest_name__startswith=benchmarking.SEED_PREFIX).count()
+        if seeded < options['orders']:
+            self.stdout.write(f'Seeding {options["orders"] - seeded} orders...')
+            try:
+                benchmarking.seed_orders(options['orders'] - seeded)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        endpoints = [
+            ('list pending', '/api/orders/?status=pending'),
+            ('list page', '/api/orders/?limit=50'),
+            ('list closed page', '/api/orders/?status=closed&limit=50'),
+            ('table stats', '/api/tables/stats/'),
+        ]
+        client = Client()
+        indexes = list(Order._meta.indexes)
+
+        def run_phase():
+            results = {}
+            for name, url in endpoints:
+                client.get(url)  # warm up
+                durations, queries, _ = benchmarking.time_call(lambda: client.get(url), options['repeat'])
+                results[name] = (benchmarking.summarize(durations), queries)
+            return results
+
+        total_orders = Order.objects.count()
+        try:
+            after = run_phase()
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Order, index)
+            before = run_phase()
+        finally:
+            with connection.schema_editor() as editor:
+                existing = connection.introspection.get_constraints(connection.cursor(), Order._meta.db_table)
+                for index in indexes:
+                    if index.name not in existing:
+                        editor.add_index(Order, index)
+            if not options['keep']:
+                self.stdout.write(f'Removed {benchmarking.remove_seeded()} seeded rows')
+
+        rows = []
+        for name, _ in endpoints:
+            b, a = before[name][0], after[name][0]
+            rows.append([name, f'{b["p50"]:.1f}', f'{a["p50"]:.1f}', f'{b["p95"]:.1f}', f'{a["p95"]:.1f}',
+                         f'{b["p50"] / a["p50"]:.1f}x' if a['p50'] else '-', after[name][1]])
+        self.stdout.write(f'\n{connection.vendor}, {total_orders} orders, {options["repeat"]} requests each (ms)')
+        self.stdout.write(benchmarking.format_table(
+            ['endpoint', 'p50 before', 'p50 after', 'p95 before', 'p95 after', 'speedup', 'queries'], rows))
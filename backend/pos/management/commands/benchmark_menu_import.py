@@ -0,0 +1,88 @@
+import csv
+import os
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from pos import benchmarking
+from pos.menu_import import import_menu, normalize, read_catalog
+from pos.models import MenuCategory, MenuItem
+
+
+class Command(BaseCommand):
+    help = 'Time the bulk menu import on a synthetic catalog against a get_or_create loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50000, help='Items in the synthetic catalog')
+        parser.add_argument('--categories', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--naive-sample', type=int, default=2000,
+                            help='Items to load with the per-row loop (extrapolated to the full catalog)')
+        parser.add_argument('--keep', action='store_true', help='Keep the imported items afterwards')
+        parser.add_argument('--seed-menu', action='store_true',
+                            help='Confirm that a synthetic catalog may be written to this database')
+
+    def handle(self, *args, **options):
+        # The synthetic categories and items show up on the live menu while the run lasts
+        if not options['seed_menu']:
+            raise CommandError(f'This imports {options["items"]} synthetic menu items; '
+                               'pass --seed-menu to confirm, on a scratch database only')
+        if not settings.DEBUG:
+            raise CommandError('Refusing to seed a synthetic menu with DEBUG off; run against a development database')
+        rng = random.Random(42)
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            self.write_catalog(path, options['items'], options['categories'], rng, reprice=0)
+            rows = [self.time_import(label, path, options['batch_size'])
+                    for label in ('first import', 'unchanged re-import')]
+            self.write_catalog(path, options['items'], options['categories'], random.Random(42), reprice=0.1)
+            rows.append(self.time_import('10% repriced', path, options['batch_size']))
+            rows.append(self.time_naive(path, options['naive_sample'], options['items']))
+        finally:
+            os.unlink(path)
+            if not options['keep']:
+                MenuCategory.objects.filter(name__startswith=benchmarking.SEED_PREFIX).delete()
+
+        self.stdout.write(f'\n{options["items"]} items in {options["categories"]} categories')
+        self.stdout.write(benchmarking.format_table(
+            ['run', 'seconds', 'items/s', 'queries', 'inserted', 'updated', 'unchanged'], rows))
+
+    def write_catalog(self, path, items, categories, rng, reprice):
+        spice_levels = ['', 'mild', 'medium', 'hot', 'very_hot']
+        changes = random.Random(7)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['category', 'name', 'price', 'description', 'is_vegetarian', 'spice_level'])
+            for i in range(items):
+                price = rng.randint(50, 2500)
+                if changes.random() < reprice:
+                    price += 10
+                writer.writerow([f'{benchmarking.SEED_PREFIX}category-{i % categories}', f'Item {i}', price,
+                                 f'Synthetic dish number {i}', rng.random() < 0.5, rng.choice(spice_levels)])
+
+    def time_import(self, label, path, batch_size):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            counts = import_menu(read_catalog(path), batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+        total = counts['inserted'] + counts['updated'] + counts['unchanged']
+        return [label, f'{elapsed:.2f}', f'{total / elapsed:.0f}', len(ctx.captured_queries),
+                counts['inserted'], counts['updated'], counts['unchanged']]
+
+    def time_naive(self, path, sample, items):
+        """The previous populate_menu approach: a lookup and get_or_create per row"""
+        rows = [normalize(row) for row, _ in zip(read_catalog(path), range(sample))]
+        with transaction.atomic(), CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for category_name, name, values in rows:
+                category, _ = MenuCategory.objects.get_or_create(name=f'{category_name}-naive')
+                MenuItem.objects.get_or_create(category=category, name=name, defaults=values)
+            elapsed = time.perf_counter() - start
+        rate = len(rows) / elapsed
+        return [f'get_or_create loop ({len(rows)} rows)', f'{items / rate:.2f} (est.)', f'{rate:.0f}',
+                len(ctx.captured_queries), len(rows), 0, 0]
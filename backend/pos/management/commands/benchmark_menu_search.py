@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+from pos import benchmarking, menu_search
+from pos.menu_import import import_menu
+from pos.models import MenuCategory, MenuItem
+
+QUERIES = [
+    ('prefix', {'query': 'pan'}),
+    ('two words', {'query': 'chicken tik'}),
+    ('fuzzy', {'query': 'panner tika'}),
+    ('veg under 300', {'is_vegetarian': True, 'max_price': Decimal('300')}),
+    ('hot, 2000+', {'spice_level': 'hot', 'min_price': Decimal('2000')}),
+    ('vegan in category', {'is_vegan': True, 'category': None}),
+    ('no match', {'query': 'pizza'}),
+    ('everything', {}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Time menu search queries against a synthetic catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50000, help='Items in the synthetic catalog')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--keep', action='store_true', help='Keep the imported items afterwards')
+        parser.add_argument('--seed-menu', action='store_true',
+                            help='Confirm that a synthetic catalog may be written to this database')
+
+    def handle(self, *args, **options):
+        # The synthetic categories and items show up on the live menu while the run lasts
+        if not options['seed_menu']:
+            raise CommandError(f'This imports {options["items"]} synthetic menu items; '
+                               'pass --seed-menu to confirm, on a scratch database only')
+        if not settings.DEBUG:
+            raise CommandError('Refusing to seed a synthetic menu with DEBUG off; run against a development database')
+        seeded = MenuItem.objects.filter(category__name__startswith=benchmarking.SEED_PREFIX).count()
+        if seeded < options['items']:
+            import_menu(benchmarking.synthetic_menu(options['items']))
+
+        durations, _, index = benchmarking.time_call(menu_search.get_index, 1)
+        build_ms = durations[0] * 1000
+        category = MenuCategory.objects.filter(name__startswith=benchmarking.SEED_PREFIX).values_list('id', flat=True).first()
+        client = APIClient()
+        rows = []
+        try:
+            for label, params in QUERIES:
+                params = {k: category if k == 'category' else v for k, v in params.items()}
+                samples, _, (results, _) = benchmarking.time_call(lambda: index.search(**params), options['repeat'])
+                query = {'q' if k == 'query' else k: str(v).lower() if isinstance(v, bool) else v
+                         for k, v in params.items()}
+                request_samples, _, _ = benchmarking.time_call(
+                    lambda: client.get('/api/menu/search/', query), options['repeat'])
+                index_stats, request_stats = benchmarking.summarize(samples), benchmarking.summarize(request_samples)
+                rows.append([label, len(results), f'{index_stats["p50"]:.2f}', f'{index_stats["p95"]:.2f}',
+                             f'{request_stats["p50"]:.2f}', f'{request_stats["p95"]:.2f}'])
+        finally:
+            if not options['keep']:
+                MenuCategory.objects.filter(name__startswith=benchmarking.SEED_PREFIX).delete()
+
+        self.stdout.write(f'\n{len(index.items)} indexed items, index built in {build_ms:.0f} ms')
+        self.stdout.write(benchmarking.format_table(
+            ['query', 'results', 'index p50 ms', 'index p95 ms', 'request p50 ms', 'request p95 ms'], rows))
@@ -0,0 +1,64 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework.renderers import JSONRenderer
+from pos import benchmarking, compression, renderers
+from pos.models import Order
+
+
+class Command(BaseCommand):
+    help = ('Compare JSON render time (DRF stdlib vs FastJSONRenderer) and wire size '
+            '(raw, gzip, brotli) for the order list and stats payloads')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=5000, help='Orders to seed')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded orders afterwards')
+
+    def handle(self, *args, **options):
+        seeded = Order.objects.filter(guest_name__startswith=benchmarking.SEED_PREFIX).count()
+        if seeded < options['orders']:
+            try:
+                # A higher open ratio than real history so /tables/stats/ has a sizeable payload
+                benchmarking.seed_orders(options['orders'] - seeded, closed_ratio=0.8)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        client = Client()
+        payloads = [
+            ('orders', '/api/orders/'),
+            ('orders compact', '/api/orders/?view=compact'),
+            ('tables stats', '/api/tables/stats/'),
+        ]
+        stdlib, fast = JSONRenderer(), renderers.FastJSONRenderer()
+        fast_name = 'orjson' if renderers.orjson else 'stdlib fallback'
+        rows = []
+        for name, url in payloads:
+            data = client.get(url).data
+            timings = {}
+            for label, renderer in (('stdlib', stdlib), ('fast', fast)):
+                best = None
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    body = renderer.render(data)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[label] = best
+            gz = len(gzip.compress(body, compresslevel=5))
+            br = len(compression.brotli.compress(body, quality=5)) if compression.brotli else None
+            rows.append([
+                name,
+                f'{timings["stdlib"] * 1000:.1f}',
+                f'{timings["fast"] * 1000:.1f}',
+                f'{len(body) / 1024:.0f}',
+                f'{gz / 1024:.0f}',
+                f'{br / 1024:.0f}' if br is not None else '-',
+            ])
+
+        if not options['keep']:
+            benchmarking.remove_seeded()
+        self.stdout.write(f'\n{options["orders"]} seeded orders, fast renderer: {fast_name}, best of {options["repeat"]}')
+        self.stdout.write(benchmarking.format_table(
+            ['payload', 'stdlib ms', 'fast ms', 'raw KiB', 'gzip KiB', 'brotli KiB'], rows))
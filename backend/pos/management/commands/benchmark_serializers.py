@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from pos import benchmarking
+from pos.models import Order
+from pos.serializers import OrderSerializer, orders_with_items, serialize_orders_compact
+
+
+class Command(BaseCommand):
+    help = 'Compare serialization time and JSON bytes per order for the full and compact order representations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=2000, help='Orders to serialize')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded orders afterwards')
+
+    def handle(self, *args, **options):
+        count = options['orders']
+        seeded = Order.objects.filter(guest_name__startswith=benchmarking.SEED_PREFIX).count()
+        if seeded < count:
+            try:
+                benchmarking.seed_orders(count - seeded)
+            except ValueError as e:
+                raise CommandError(str(e))
+        orders = list(orders_with_items().filter(guest_name__startswith=benchmarking.SEED_PREFIX)
+                      .order_by('-created_at')[:count])
+
+        renderer = JSONRenderer()
+        variants = [
+            ('OrderSerializer', lambda: OrderSerializer(orders, many=True).data),
+            ('compact', lambda: (lambda r: {'results': r[0], **r[1]})(serialize_orders_compact(orders))),
+        ]
+        rows = []
+        for name, build in variants:
+            serialize_times, render_times = [], []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                data = build()
+                serialize_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                body = renderer.render(data)
+                render_times.append(time.perf_counter() - start)
+            n = len(orders)
+            rows.append([
+                name,
+                f'{min(serialize_times) / n * 1e6:.1f}',
+                f'{min(render_times) / n * 1e6:.1f}',
+                f'{len(body) / n:.0f}',
+                f'{len(body) / 1024:.0f}',
+            ])
+
+        if not options['keep']:
+            benchmarking.remove_seeded()
+        self.stdout.write(f'\n{len(orders)} orders, best of {options["repeat"]}')
+        self.stdout.write(benchmarking.format_table(
+            ['representation', 'serialize us/order', 'render us/order', 'bytes/order', 'total KiB'], rows))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from pos.menu_import import import_menu, read_catalog
+
+
+class Command(BaseCommand):
+    help = 'Import (upsert) menu items from a CSV, JSON or JSON Lines catalog in one transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Catalog file; columns: category, name, price, description, '
+                                         'is_vegetarian, is_vegan, spice_level, is_available')
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-update', action='store_true', help='Only insert new items; leave existing ones alone')
+        parser.add_argument('--dry-run', action='store_true', help='Report the counts and roll back')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be >= 1')
+        start = time.perf_counter()
+        try:
+            counts = import_menu(read_catalog(options['path'], options['format']), batch_size=options['batch_size'],
+                                 update=not options['no_update'], dry_run=options['dry_run'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+        summary = (f'{counts["inserted"]} inserted, {counts["updated"]} updated, {counts["unchanged"]} unchanged, '
+                   f'{counts["skipped"]} skipped, {counts["categories"]} new categories')
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(f'{prefix}{summary} in {elapsed:.2f}s'))
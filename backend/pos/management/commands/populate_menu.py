@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from pos.models import MenuCategory, MenuItem, User
+from pos.menu_import import import_menu
+from pos.models import MenuCategory, User
 
 
 class Command(BaseCommand):
@@ -19,16 +20,14 @@ class Command(BaseCommand):
             {'name': 'Beverages', 'description': 'Refreshing drinks', 'order': 7},
         ]
 
+        existing = set(MenuCategory.objects.values_list('name', flat=True))
         for cat_data in categories_data:
-            category, created = MenuCategory.objects.get_or_create(
-                name=cat_data['name'],
-                defaults={
-                    'description': cat_data['description'],
-                    'order': cat_data['order']
-                }
-            )
+            if cat_data['name'] in existing:
+                continue
+            # get_or_create rather than bulk_create(ignore_conflicts=True), which can't say which rows it skipped
+            _, created = MenuCategory.objects.get_or_create(name=cat_data['name'], defaults=cat_data)
             if created:
-                self.stdout.write(f'  Created category: {category.name}')
+                self.stdout.write(f'  Created category: {cat_data["name"]}')
 
         # Menu items
         menu_items = [
@@ -389,15 +388,9 @@ class Command(BaseCommand):
             },
         ]
 
-        for item_data in menu_items:
-            category = MenuCategory.objects.get(name=item_data.pop('category'))
-            item, created = MenuItem.objects.get_or_create(
-                category=category,
-                name=item_data['name'],
-                defaults=item_data
-            )
-            if created:
-                self.stdout.write(f'  Created item: {item.name}')
+        # Existing items are left as they are, so re-running keeps edited prices
+        counts = import_menu(menu_items, update=False)
+        self.stdout.write(f'  Created {counts["inserted"]} items ({counts["unchanged"] + counts["skipped"]} already present)')
 
         # Create sample users
         users_data = [
@@ -408,16 +401,15 @@ class Command(BaseCommand):
             {'username': 'chef1', 'password': 'chef123', 'role': 'chef', 'email': 'chef@hotel.com'},
         ]
 
+        existing = set(User.objects.filter(username__in=[u['username'] for u in users_data]).values_list('username', flat=True))
         for user_data in users_data:
+            if user_data['username'] in existing:
+                continue
             password = user_data.pop('password')
-            user, created = User.objects.get_or_create(
-                username=user_data['username'],
-                defaults=user_data
-            )
-            if created:
-                user.set_password(password)
-                user.save()
-                self.stdout.write(self.style.SUCCESS(f'  Created user: {user.username} (password: {password})'))
+            user = User(**user_data)
+            user.set_password(password)
+            user.save()
+            self.stdout.write(self.style.SUCCESS(f'  Created user: {user.username} (password: {password})'))
 
         self.stdout.write(self.style.SUCCESS('\nDatabase populated successfully!'))
         self.stdout.write(self.style.SUCCESS('\nSample Login Credentials:'))
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from pos import idempotency
+
+
+class Command(BaseCommand):
+    help = 'Delete stored order-submission idempotency keys older than POS_IDEMPOTENCY_KEY_TTL'
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} idempotency keys older than {settings.POS_IDEMPOTENCY_KEY_TTL}s'))
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from pos import analytics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the hourly / daily sales rollups from closed and archived orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First day to rebuild (YYYY-MM-DD); default: all orders')
+        parser.add_argument('--to', dest='end', help='Last day to rebuild (YYYY-MM-DD, inclusive); default: --from')
+
+    def handle(self, *args, **options):
+        if not options['start']:
+            if options['end']:
+                raise CommandError('--to needs --from')
+            rows = analytics.rebuild_all()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt all sales rollups ({rows} rows)'))
+            return
+
+        first = parse_date(options['start'])
+        last = parse_date(options['end']) if options['end'] else first
+        if first is None or last is None or first > last:
+            raise CommandError('--from / --to must be dates (YYYY-MM-DD) with --from <= --to')
+        start = timezone.make_aware(datetime.combine(first, datetime.min.time()))
+        end = timezone.make_aware(datetime.combine(last + timedelta(days=1), datetime.min.time()))
+        rows = 0
+        while start < end:
+            chunk_end = min(start + analytics.REBUILD_CHUNK, end)
+            rows += analytics.rebuild(start, chunk_end)
+            start = chunk_end
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sales rollups for {first} to {last} ({rows} rows)'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from pos.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Backfill or verify the stored Order.total and Order.item_count against order items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report mismatched orders, do not fix them')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        check_only = options['check']
+        batch_size = options['batch_size']
+        expressions = Order.totals_expressions(prefix='items__')
+        orders = Order.objects.annotate(
+            expected_total=expressions['total'],
+            expected_count=expressions['item_count'],
+        ).order_by('pk')
+
+        checked = 0
+        mismatched = []
+        for order in orders.iterator(chunk_size=batch_size):
+            checked += 1
+            if order.total != order.expected_total or order.item_count != order.expected_count:
+                order.total = order.expected_total
+                order.item_count = order.expected_count
+                mismatched.append(order)
+
+        if check_only:
+            for order in mismatched:
+                self.stdout.write(f'  Order #{order.id}: expected total {order.total}, {order.item_count} items')
+            if mismatched:
+                raise CommandError(f'Checked {checked} orders, {len(mismatched)} mismatched')
+            self.stdout.write(self.style.SUCCESS(f'Checked {checked} orders, all consistent'))
+            return
+
+        with transaction.atomic():
+            Order.objects.bulk_update(mismatched, ['total', 'item_count'], batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} orders, {len(mismatched)} fixed'))
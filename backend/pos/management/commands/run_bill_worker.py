@@ -0,0 +1,31 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from pos import bills
+
+
+class Command(BaseCommand):
+    help = 'Process queued bill rendering and email jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.POS_BILL_WORKER_CONCURRENCY,
+                            help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        requeued = bills.requeue_stale(timedelta(seconds=settings.POS_BILL_JOB_STALE_SECONDS))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+
+        concurrency = max(1, options['concurrency'])
+        self.stdout.write(f'Bill worker running with {concurrency} thread(s)...')
+        stop = threading.Event()
+        try:
+            bills.run_workers(stop, concurrency, options['poll_interval'], drain=options['once'])
+        except KeyboardInterrupt:
+            stop.set()
+        self.stdout.write(self.style.SUCCESS('Bill worker stopped'))
@@ -0,0 +1,56 @@
+import uuid
+
+from django.core.cache import cache
+
+VERSION_KEY = 'pos:menu:version'
+PAYLOAD_KEY = 'pos:menu:{kind}:{version}'
+PAYLOAD_TIMEOUT = 24 * 60 * 60
+
+
+def get_version():
+    """Current menu version token, created on first use"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_version():
+    """Invalidate every cached menu payload by moving to a new version"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def etag_for(kind, version):
+    return f'"menu-{kind}-{version}"'
+
+
+def get_payload(kind, version, build):
+    """Serialized menu payload for `version`, built with `build()` on a miss"""
+    key = PAYLOAD_KEY.format(kind=kind, version=version)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout=PAYLOAD_TIMEOUT)
+    return data
+
+
+async def aget_version():
+    """get_version() for async views"""
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not await cache.aadd(VERSION_KEY, version, timeout=None):
+            version = await cache.aget(VERSION_KEY, version)
+    return version
+
+
+async def aget_payload(kind, version, build):
+    """get_payload() for async views; `build` is a coroutine function"""
+    key = PAYLOAD_KEY.format(kind=kind, version=version)
+    data = await cache.aget(key)
+    if data is None:
+        data = await build()
+        await cache.aset(key, data, timeout=PAYLOAD_TIMEOUT)
+    return data
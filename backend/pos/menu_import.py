@@ -0,0 +1,177 @@
+"""Bulk menu import.
+
+Catalog rows are streamed in batches and upserted on the (category, name)
+natural key with one INSERT ... ON CONFLICT per batch. Categories are
+resolved once into a dict and each category's current items are read once,
+so unchanged rows cost no writes. bulk_create sends no post_save signals,
+so the menu version is bumped once, after the import commits.
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Max
+
+from . import menu_cache
+from .models import MenuCategory, MenuItem
+
+ITEM_FIELDS = ['description', 'price', 'is_vegetarian', 'is_vegan', 'spice_level', 'is_available']
+SPICE_LEVELS = {choice for choice, _ in MenuItem._meta.get_field('spice_level').choices}
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+CENTS = Decimal('0.01')
+
+
+class MenuImportError(ValueError):
+    pass
+
+
+def read_catalog(path, fmt=None):
+    """Yield catalog rows (dicts) from a CSV, JSON array or JSON Lines file"""
+    fmt = fmt or path.rsplit('.', 1)[-1].lower()
+    with open(path, encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        elif fmt == 'jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif fmt == 'json':
+            rows = json.load(f)
+            if not isinstance(rows, list):
+                raise MenuImportError('JSON catalog must be a list of items')
+            yield from rows
+        else:
+            raise MenuImportError(f'unknown catalog format: {fmt}')
+
+
+def _flag(value, default):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    # A blank cell is a missing value, not "no"
+    if not text:
+        return default
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise MenuImportError(f'not a boolean: {value!r}')
+
+
+def normalize(row):
+    """(category name, item name, {field: value}) for a raw catalog row"""
+    if not isinstance(row, dict):
+        raise MenuImportError('item must be an object')
+    category = str(row.get('category') or '').strip()
+    name = str(row.get('name') or '').strip()
+    if not category or not name:
+        raise MenuImportError('category and name are required')
+    try:
+        price = Decimal(str(row.get('price')))
+        # NaN and Infinity parse as Decimals but are not prices
+        if not price.is_finite() or price < 0:
+            raise InvalidOperation
+        price = price.quantize(CENTS)
+    except InvalidOperation:
+        raise MenuImportError(f'invalid price: {row.get("price")!r}')
+    spice_level = str(row.get('spice_level') or '').strip()
+    if spice_level and spice_level not in SPICE_LEVELS:
+        raise MenuImportError(f'invalid spice_level: {spice_level!r}')
+    return category, name, {
+        'description': str(row.get('description') or ''),
+        'price': price,
+        'is_vegetarian': _flag(row.get('is_vegetarian'), False),
+        'is_vegan': _flag(row.get('is_vegan'), False),
+        'spice_level': spice_level,
+        'is_available': _flag(row.get('is_available'), True),
+    }
+
+
+class MenuImporter:
+    """Upserts catalog rows batch by batch; call run() inside a transaction"""
+
+    def __init__(self, batch_size=1000, update=True):
+        self.batch_size = batch_size
+        self.update = update
+        self.categories = dict(MenuCategory.objects.values_list('name', 'id'))
+        self.existing = {}
+        self.loaded = set()
+        self.counts = {'categories': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+        self.rows = 0
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return self.counts
+            self.import_batch(batch)
+
+    def _resolve_categories(self, names):
+        missing = sorted(set(names) - self.categories.keys())
+        if not missing:
+            return
+        next_order = (MenuCategory.objects.aggregate(last=Max('order'))['last'] or 0) + 1
+        MenuCategory.objects.bulk_create(
+            [MenuCategory(name=name, order=next_order + i) for i, name in enumerate(missing)], ignore_conflicts=True)
+        self.categories.update(MenuCategory.objects.filter(name__in=missing).values_list('name', 'id'))
+        self.counts['categories'] += len(missing)
+
+    def import_batch(self, batch):
+        items = {}
+        for row in batch:
+            self.rows += 1
+            try:
+                category, name, values = normalize(row)
+            except MenuImportError as e:
+                raise MenuImportError(f'row {self.rows}: {e}')
+            # A later row for the same item wins
+            items[(category, name)] = values
+        self._resolve_categories(category for category, _ in items)
+
+        keyed = {(self.categories[category], name): values for (category, name), values in items.items()}
+        # Current items of each category are read once, the first time the category shows up
+        unseen = {category_id for category_id, _ in keyed} - self.loaded
+        if unseen:
+            for row in (MenuItem.objects.filter(category_id__in=unseen).order_by()
+                        .values_list('category_id', 'name', *ITEM_FIELDS)):
+                self.existing[(row[0], row[1])] = row[2:]
+            self.loaded |= unseen
+        writes = []
+        for (category_id, name), values in keyed.items():
+            current = self.existing.get((category_id, name))
+            if current is None:
+                self.counts['inserted'] += 1
+            elif tuple(values[f] for f in ITEM_FIELDS) == current:
+                self.counts['unchanged'] += 1
+                continue
+            elif not self.update:
+                self.counts['skipped'] += 1
+                continue
+            else:
+                self.counts['updated'] += 1
+            self.existing[(category_id, name)] = tuple(values[f] for f in ITEM_FIELDS)
+            writes.append(MenuItem(category_id=category_id, name=name, **values))
+        if writes:
+            MenuItem.objects.bulk_create(writes, update_conflicts=True, unique_fields=['category', 'name'],
+                                         update_fields=ITEM_FIELDS)
+
+
+def import_menu(rows, batch_size=1000, update=True, dry_run=False):
+    """Upsert catalog rows; returns counts of categories created and items inserted / updated / unchanged / skipped.
+
+    With update=False existing items that differ are left alone (counted as skipped).
+    """
+    importer = MenuImporter(batch_size=batch_size, update=update)
+    with transaction.atomic():
+        counts = importer.run(rows)
+        if dry_run:
+            transaction.set_rollback(True)
+        elif counts['categories'] or counts['inserted'] or counts['updated']:
+            transaction.on_commit(menu_cache.bump_version)
+    return counts
@@ -0,0 +1,179 @@
+"""In-memory menu search index.
+
+Each worker process keeps one index of the available menu items and
+rebuilds it when the menu version (pos.menu_cache) moves on. Query words
+are matched against name words by prefix; when nothing matches, by
+trigram similarity, which tolerates typos ("panner tika").
+"""
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from . import menu_cache
+from .models import MenuItem
+
+WORD_RE = re.compile(r'\w+')
+FUZZY_MIN_SIMILARITY = 0.3
+# Sorts after every word that starts with a given prefix
+PREFIX_END = '\U0010ffff'
+
+
+def _words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def _trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MenuIndex:
+    def __init__(self, version, rows):
+        self.version = version
+        self.items = []
+        self.names = []
+        # (filter, value) -> indexes of the matching items, in menu order
+        self.postings = {}
+        # word -> indexes of the items whose name contains it
+        self.vocabulary = {}
+        categories = {}
+        for idx, row in enumerate(rows):
+            category = categories.setdefault(row['category_id'], {
+                'id': row['category_id'], 'name': row['category__name'],
+                'description': row['category__description'], 'order': row['category__order'],
+            })
+            payload = {
+                'id': row['id'], 'category': category, 'name': row['name'], 'description': row['description'],
+                'price': f"{row['price']:.2f}", 'is_vegetarian': row['is_vegetarian'], 'is_vegan': row['is_vegan'],
+                'spice_level': row['spice_level'], 'is_available': True,
+            }
+            self.items.append((row['category_id'], row['is_vegetarian'], row['is_vegan'], row['spice_level'],
+                               row['price'], payload))
+            self.names.append(row['name'].lower())
+            for key in (('category', row['category_id']), ('is_vegetarian', row['is_vegetarian']),
+                        ('is_vegan', row['is_vegan']), ('spice_level', row['spice_level'])):
+                self.postings.setdefault(key, []).append(idx)
+            for word in set(_words(row['name'])):
+                self.vocabulary.setdefault(word, []).append(idx)
+        self.by_price = sorted(range(len(self.items)), key=lambda idx: self.items[idx][4])
+        self.prices = [self.items[idx][4] for idx in self.by_price]
+        self.words = sorted(self.vocabulary)
+        self.trigrams = {}
+        self.trigram_counts = {}
+        for word in self.words:
+            grams = _trigrams(word)
+            for gram in grams:
+                self.trigrams.setdefault(gram, []).append(word)
+            self.trigram_counts[word] = len(grams)
+
+    @classmethod
+    def build(cls, version):
+        rows = (MenuItem.objects.filter(is_available=True)
+                .order_by('category__order', 'category__name', 'name')
+                .values('id', 'category_id', 'category__name', 'category__description', 'category__order', 'name',
+                        'description', 'price', 'is_vegetarian', 'is_vegan', 'spice_level'))
+        return cls(version, rows.iterator(chunk_size=2000))
+
+    def _prefix_matches(self, query):
+        """Indexes of items with a word starting with every query word, in menu order"""
+        matched = None
+        for term in _words(query):
+            words = self.words[bisect_left(self.words, term):bisect_left(self.words, term + PREFIX_END)]
+            hits = set().union(*map(self.vocabulary.__getitem__, words))
+            matched = hits if matched is None else matched & hits
+            if not matched:
+                return []
+        return sorted(matched or [])
+
+    def _ranked(self, matches, query):
+        """Names that start with the whole query first, each group in menu order"""
+        query = query.lower().strip()
+        yield from (idx for idx in matches if self.names[idx].startswith(query))
+        yield from (idx for idx in matches if not self.names[idx].startswith(query))
+
+    def _candidates(self, filters, min_price, max_price):
+        """The shortest posting list for the filters (menu order); None means all items"""
+        lists = [self.postings.get(key, []) for key in filters]
+        if min_price is not None or max_price is not None:
+            lo = bisect_left(self.prices, min_price) if min_price is not None else 0
+            hi = bisect_right(self.prices, max_price) if max_price is not None else len(self.prices)
+            lists.append(range(lo, hi))
+        if not lists:
+            return None
+        best = min(lists, key=len)
+        if isinstance(best, range):
+            return sorted(self.by_price[best.start:best.stop])
+        return best
+
+    def _fuzzy_matches(self, query):
+        """Indexes of items with a word similar to every query word, best matches first"""
+        scores = None
+        for term in _words(query):
+            grams = _trigrams(term)
+            common = Counter()
+            for gram in grams:
+                common.update(self.trigrams.get(gram, ()))
+            term_scores = {}
+            for word, shared in common.items():
+                similarity = shared / (len(grams) + self.trigram_counts[word] - shared)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    for idx in self.vocabulary[word]:
+                        term_scores[idx] = max(similarity, term_scores.get(idx, 0))
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {idx: score + term_scores[idx] for idx, score in scores.items() if idx in term_scores}
+            if not scores:
+                return []
+        return sorted(scores or [], key=lambda idx: (-scores[idx], idx))
+
+    def search(self, query='', category=None, is_vegetarian=None, is_vegan=None, spice_level=None,
+               min_price=None, max_price=None, offset=0, limit=50):
+        """Returns (item payloads, whether there are more matches)"""
+        if query:
+            matches = self._prefix_matches(query)
+            candidates = self._ranked(matches, query) if matches else self._fuzzy_matches(query)
+        else:
+            filters = [(name, value) for name, value in (('category', category), ('is_vegetarian', is_vegetarian),
+                                                         ('is_vegan', is_vegan), ('spice_level', spice_level))
+                       if value is not None]
+            candidates = self._candidates(filters, min_price, max_price)
+            if candidates is None:
+                candidates = range(len(self.items))
+
+        results = []
+        skipped = 0
+        for idx in candidates:
+            item_category, veg, vegan, spice, price, payload = self.items[idx]
+            if ((category is not None and item_category != category)
+                    or (is_vegetarian is not None and veg != is_vegetarian)
+                    or (is_vegan is not None and vegan != is_vegan)
+                    or (spice_level is not None and spice != spice_level)
+                    or (min_price is not None and price < min_price)
+                    or (max_price is not None and price > max_price)):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            if len(results) == limit:
+                return results, True
+            results.append(payload)
+        return results, False
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """The index for the current menu version, rebuilt (once per process) when the menu changes"""
+    global _index
+    version = menu_cache.get_version()
+    index = _index
+    if index is None or index.version != version:
+        with _lock:
+            index = _index
+            if index is None or index.version != version:
+                index = _index = MenuIndex.build(version)
+    return index
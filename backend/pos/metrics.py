@@ -0,0 +1,183 @@
+"""Per-request latency / query instrumentation.
+
+RequestMetricsMiddleware records wall time, DB query count and time,
+serializer time and response size per view, adds them to the response as a
+Server-Timing header, and aggregates them for the Prometheus-style /metrics
+endpoint. Metrics are kept per process. Works under WSGI and ASGI.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('pos.slow_requests')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Context-local rather than thread-local: follows a request through sync_to_async
+_local = Local()
+
+
+class RequestSample:
+    def __init__(self, capture_sql):
+        self.capture_sql = capture_sql
+        self.queries = 0
+        self.db_time = 0.0
+        self.sql = []
+        self.timings = defaultdict(float)
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            if self.capture_sql:
+                self.sql.append((elapsed, sql))
+
+
+@contextmanager
+def timer(name):
+    """Adds the time spent in the block to the current request's `name` timing"""
+    sample = getattr(_local, 'sample', None)
+    if sample is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample.timings[name] += time.perf_counter() - start
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.sums = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, view, method, status_code, duration, sample, size):
+        with self.lock:
+            self.requests[(view, method, status_code)] += 1
+            buckets = self.buckets[(view, method)]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+            sums = self.sums[(view, method)]
+            sums['count'] += 1
+            sums['duration'] += duration
+            sums['db_queries'] += sample.queries
+            sums['db_duration'] += sample.db_time
+            sums['serialize_duration'] += sample.timings.get('serialize', 0.0)
+            sums['response_bytes'] += size
+
+    def render(self):
+        """Prometheus text exposition format"""
+        out = []
+        with self.lock:
+            out.append('# TYPE pos_http_requests_total counter')
+            for (view, method, code), n in sorted(self.requests.items()):
+                out.append(f'pos_http_requests_total{{view="{view}",method="{method}",status="{code}"}} {n}')
+            out.append('# TYPE pos_http_request_duration_seconds histogram')
+            for (view, method), buckets in sorted(self.buckets.items()):
+                labels = f'view="{view}",method="{method}"'
+                for bound, n in zip(DURATION_BUCKETS, buckets):
+                    out.append(f'pos_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {n}')
+                sums = self.sums[(view, method)]
+                out.append(f'pos_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {int(sums["count"])}')
+                out.append(f'pos_http_request_duration_seconds_sum{{{labels}}} {sums["duration"]:.6f}')
+                out.append(f'pos_http_request_duration_seconds_count{{{labels}}} {int(sums["count"])}')
+            for metric, key, kind in [
+                ('pos_db_queries_total', 'db_queries', 'counter'),
+                ('pos_db_duration_seconds_total', 'db_duration', 'counter'),
+                ('pos_serialize_duration_seconds_total', 'serialize_duration', 'counter'),
+                ('pos_http_response_bytes_total', 'response_bytes', 'counter'),
+            ]:
+                out.append(f'# TYPE {metric} {kind}')
+                for (view, method), sums in sorted(self.sums.items()):
+                    value = sums[key]
+                    value = f'{value:.6f}' if isinstance(value, float) and not value.is_integer() else int(value)
+                    out.append(f'{metric}{{view="{view}",method="{method}"}} {value}')
+        return '\n'.join(out) + '\n'
+
+
+registry = Registry()
+
+
+def _wrap_connections(stack, sample):
+    for conn in connections.all():
+        stack.enter_context(conn.execute_wrapper(sample.db_wrapper))
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.POS_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_seconds = settings.POS_SLOW_REQUEST_MS / 1000
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        sample = RequestSample(capture_sql=self.slow_seconds > 0)
+        _local.sample = sample
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, sample)
+                response = self.get_response(request)
+        finally:
+            _local.sample = None
+        return self.record(request, response, sample, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        sample = RequestSample(capture_sql=self.slow_seconds > 0)
+        _local.sample = sample
+        start = time.perf_counter()
+        # Connections are per thread and the async ORM runs queries in the
+        # request's sync thread, so the wrappers are installed (and removed) there
+        stack = ExitStack()
+        try:
+            await sync_to_async(_wrap_connections)(stack, sample)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _local.sample = None
+        return self.record(request, response, sample, time.perf_counter() - start)
+
+    def record(self, request, response, sample, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(view, request.method, response.status_code, duration, sample, size)
+
+        timings = [f'db;dur={sample.db_time * 1000:.1f};desc="{sample.queries} queries"']
+        timings += [f'{name};dur={value * 1000:.1f}' for name, value in sample.timings.items()]
+        timings.append(f'total;dur={duration * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        if self.slow_seconds and duration >= self.slow_seconds:
+            trace = '\n'.join(f'  {elapsed * 1000:8.1f}ms  {sql}' for elapsed, sql in sample.sql)
+            logger.warning('Slow request %s %s (%s): %.1fms, %d queries (%.1fms in DB)\n%s',
+                           request.method, request.get_full_path(), view, duration * 1000,
+                           sample.queries, sample.db_time * 1000, trace)
+        return response
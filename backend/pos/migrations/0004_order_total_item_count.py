@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:33
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    Order = apps.get_model('pos', 'Order')
+    money = DecimalField(max_digits=10, decimal_places=2)
+    orders = Order.objects.annotate(
+        computed_total=Coalesce(Sum(F('items__unit_price') * F('items__quantity'), output_field=money), Value(0), output_field=money),
+        computed_count=Coalesce(Sum('items__quantity'), Value(0)),
+    )
+    for order in orders.iterator():
+        order.total = order.computed_total
+        order.item_count = order.computed_count
+        order.save(update_fields=['total', 'item_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0003_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0007_archived_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket', models.DateTimeField()),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('item', 'Menu item'), ('category', 'Category'), ('waiter', 'Waiter')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=50)),
+                ('label', models.CharField(blank=True, max_length=200)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('orders', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'dimension', 'bucket', 'key'), name='pos_salesrollup_unique')],
+            },
+        ),
+    ]
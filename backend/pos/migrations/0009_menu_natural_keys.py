@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0008_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='menucategory',
+            constraint=models.UniqueConstraint(fields=('name',), name='pos_menucategory_name_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='menuitem',
+            constraint=models.UniqueConstraint(fields=('category', 'name'), name='pos_menuitem_unique'),
+        ),
+    ]
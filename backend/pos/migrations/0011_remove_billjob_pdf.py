@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0010_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='billjob',
+            name='pdf',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+def delete_render_jobs(apps, schema_editor):
+    # Render jobs only warmed the bill PDF cache, which /bill/pdf/ fills on demand
+    BillJob = apps.get_model('pos', 'BillJob')
+    BillJob.objects.filter(kind='render').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0011_remove_billjob_pdf'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_render_jobs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='billjob',
+            name='kind',
+            field=models.CharField(choices=[('email', 'Email bill')], max_length=20),
+        ),
+    ]
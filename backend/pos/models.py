@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 
@@ -28,6 +31,9 @@ class MenuCategory(models.Model):
     class Meta:
         ordering = ['order', 'name']
         verbose_name_plural = 'Menu Categories'
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='pos_menucategory_name_unique'),
+        ]
 
     def __str__(self):
         return self.name
@@ -50,6 +56,10 @@ class MenuItem(models.Model):
 
     class Meta:
         ordering = ['category', 'name']
+        constraints = [
+            # Natural key used by the menu import upsert
+            models.UniqueConstraint(fields=['category', 'name'], name='pos_menuitem_unique'),
+        ]
 
     def __str__(self):
         return f"{self.name} (₹{self.price})"
@@ -72,14 +82,56 @@ class Order(models.Model):
         (STATUS_CLOSED, 'Closed'),
     ]
 
+    # Orders move through STATUS_CHOICES in order, one step at a time
+    NEXT_STATUS = {current[0]: following[0] for current, following in zip(STATUS_CHOICES, STATUS_CHOICES[1:])}
+    PREVIOUS_STATUS = {following: current for current, following in NEXT_STATUS.items()}
+
     guest_name = models.CharField(max_length=200)
     table_number = models.CharField(max_length=50)
     waiter = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='orders')
     status = models.CharField(max_length=32, choices=STATUS_CHOICES, default=STATUS_PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from OrderItem rows, kept in step by OrderItem.save()/delete()
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='pos_order_status_created_idx'),
+            models.Index(fields=['table_number', 'status'], name='pos_order_table_status_idx'),
+            models.Index(fields=['-created_at', '-id'], name='pos_order_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='pos_order_updated_idx'),
+            # Only open orders: stays small however much history accumulates
+            models.Index(fields=['table_number', 'created_at'], name='pos_order_open_idx',
+                         condition=~models.Q(status='closed')),
+        ]
+
+    @staticmethod
+    def totals_expressions(prefix=''):
+        """Aggregate expressions for (total, item_count) over an order's items"""
+        money = DecimalField(max_digits=10, decimal_places=2)
+        line_total = F(f'{prefix}unit_price') * F(f'{prefix}quantity')
+        return {
+            'total': Coalesce(Sum(line_total, output_field=money), Value(0), output_field=money),
+            'item_count': Coalesce(Sum(f'{prefix}quantity'), Value(0)),
+        }
 
-    def total(self):
-        return sum([item.total_price() for item in self.items.all()])
+    @classmethod
+    def transition(cls, pk, from_status, to_status):
+        """Conditionally move an order from `from_status` to `to_status` in one UPDATE.
+
+        Returns False when the order no longer has `from_status` (or doesn't exist).
+        """
+        return cls.objects.filter(pk=pk, status=from_status).update(status=to_status, updated_at=timezone.now()) == 1
+
+    def update_totals(self):
+        """Recompute total and item_count from the items table and store them"""
+        totals = self.items.aggregate(**self.totals_expressions())
+        self.total = totals['total']
+        self.item_count = totals['item_count']
+        self.updated_at = timezone.now()
+        Order.objects.filter(pk=self.pk).update(total=self.total, item_count=self.item_count, updated_at=self.updated_at)
 
     def __str__(self):
         return f"Order #{self.id} - {self.status}"
@@ -95,9 +147,157 @@ class OrderItem(models.Model):
         if not self.unit_price:
             self.unit_price = self.menu_item.price
         super().save(*args, **kwargs)
+        self.order.update_totals()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.order.update_totals()
+        return result
 
     def total_price(self):
         return self.unit_price * self.quantity
 
     def __str__(self):
         return f"{self.quantity}x {self.menu_item.name}"
+
+
+class BillJob(models.Model):
+    """Background bill rendering / email delivery, processed by run_bill_worker"""
+    KIND_EMAIL = 'email'
+
+    KIND_CHOICES = [
+        (KIND_EMAIL, 'Email bill'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    order = models.ForeignKey(Order, related_name='bill_jobs', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    email = models.EmailField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f"BillJob #{self.id} {self.kind} for order #{self.order_id} - {self.status}"
+
+
+class ArchivedOrder(models.Model):
+    """Closed order moved out of the hot Order table by archive_orders; keeps its original id"""
+    id = models.BigIntegerField(primary_key=True)
+    guest_name = models.CharField(max_length=200)
+    table_number = models.CharField(max_length=50)
+    waiter = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='archived_orders')
+    status = models.CharField(max_length=32, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    item_count = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='pos_archorder_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.id} - {self.status}"
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, related_name='items', on_delete=models.CASCADE)
+    # Menu items may be removed later, so the name is kept alongside the reference
+    menu_item = models.ForeignKey(MenuItem, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    menu_item_name = models.CharField(max_length=200)
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=8, decimal_places=2)
+
+    def total_price(self):
+        return self.unit_price * self.quantity
+
+    def __str__(self):
+        return f"{self.quantity}x {self.menu_item_name}"
+
+
+class SalesRollup(models.Model):
+    """Pre-aggregated sales of closed orders, bucketed by order time.
+
+    Totals are kept per hour and per day; item / category / waiter rows per day.
+
+    Maintained by pos.analytics as orders close; rebuild with rebuild_sales_rollups.
+    """
+    PERIOD_HOUR = 'hour'
+    PERIOD_DAY = 'day'
+
+    PERIOD_CHOICES = [
+        (PERIOD_HOUR, 'Hour'),
+        (PERIOD_DAY, 'Day'),
+    ]
+
+    DIMENSION_TOTAL = 'total'
+    DIMENSION_ITEM = 'item'
+    DIMENSION_CATEGORY = 'category'
+    DIMENSION_WAITER = 'waiter'
+
+    DIMENSION_CHOICES = [
+        (DIMENSION_TOTAL, 'Total'),
+        (DIMENSION_ITEM, 'Menu item'),
+        (DIMENSION_CATEGORY, 'Category'),
+        (DIMENSION_WAITER, 'Waiter'),
+    ]
+
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    # Id of the item / category / waiter ('' for totals) and its name when aggregated
+    key = models.CharField(max_length=50, blank=True)
+    label = models.CharField(max_length=200, blank=True)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'dimension', 'bucket', 'key'], name='pos_salesrollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket:%Y-%m-%d %H:%M} {self.dimension} {self.label or self.key}: {self.revenue}"
+
+
+class IdempotencyKey(models.Model):
+    """Response of an order submission, replayed when a client retries with the same Idempotency-Key"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=100)
+    # SHA-256 of the request body, to reject a key reused for a different request
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(default=0)
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='pos_idempotencykey_unique'),
+        ]
+        indexes = [models.Index(fields=['created_at'])]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id}) -> {self.status_code}"
@@ -0,0 +1,102 @@
+import base64
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+# updated_at is stamped before the transaction commits, so a row stamped
+# earlier can become visible after later ones were already handed out.
+# Delta cursors never get closer to now than this, so every poll re-reads
+# the most recent window and clients de-duplicate by id.
+DELTA_OVERLAP = timedelta(seconds=10)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Returns (timestamp, pk) for a cursor produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        timestamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(str(e))
+
+
+def parse_limit(value, default, maximum):
+    try:
+        limit = int(value) if value else default
+    except (TypeError, ValueError):
+        raise InvalidCursor('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def _keyset_query(qs, cursor):
+    qs = qs.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return qs
+
+
+def _keyset_result(rows, limit):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    return rows, next_cursor
+
+
+def keyset_page(qs, cursor, limit):
+    """Newest-first page of orders strictly older than `cursor` on (created_at, id)"""
+    return _keyset_result(list(_keyset_query(qs, cursor)[:limit + 1]), limit)
+
+
+async def akeyset_page(qs, cursor, limit):
+    """keyset_page() with the async ORM"""
+    return _keyset_result([row async for row in _keyset_query(qs, cursor)[:limit + 1]], limit)
+
+
+def _changes_query(qs, cursor):
+    qs = qs.order_by('updated_at', 'id')
+    if cursor:
+        updated_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+    return qs
+
+
+def changes_horizon():
+    """A delta cursor for changes from now on (minus DELTA_OVERLAP)"""
+    return encode_cursor(timezone.now() - DELTA_OVERLAP, 0)
+
+
+def _changes_result(rows, cursor, limit):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = encode_cursor(rows[-1].updated_at, rows[-1].id)
+    if cursor and not has_more and decode_cursor(cursor)[0] > timezone.now() - DELTA_OVERLAP:
+        cursor = changes_horizon()
+    return rows, cursor or None, has_more
+
+
+def changes_since(qs, cursor, limit):
+    """Oldest-first orders created or modified after `cursor` on (updated_at, id).
+
+    The returned cursor points at the last row handed out (or echoes the
+    incoming one when nothing changed), so clients can poll with it forever.
+    On the last page it is held DELTA_OVERLAP behind now, so rows modified
+    recently are returned again by the next poll.
+    """
+    return _changes_result(list(_changes_query(qs, cursor)[:limit + 1]), cursor, limit)
+
+
+async def achanges_since(qs, cursor, limit):
+    """changes_since() with the async ORM"""
+    return _changes_result([row async for row in _changes_query(qs, cursor)[:limit + 1]], cursor, limit)
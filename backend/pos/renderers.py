@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to DRF's stdlib json renderer
+    orjson = None
+
+
+class DecimalStringEncoder(JSONEncoder):
+    """DRF's encoder, but raw Decimals render as strings, the way serializer
+    fields render them with COERCE_DECIMAL_TO_STRING"""
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+_default = DecimalStringEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson when it is installed.
+
+    Both paths produce the same bytes: datetimes and Decimals are passed
+    through to the same encoder the stdlib fallback uses, and U+2028/U+2029
+    are escaped as DRF does. Indented output (e.g. ?indent= from the
+    browsable API) and installs without orjson use the stdlib renderer.
+    """
+    encoder_class = DecimalStringEncoder
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        body = orjson.dumps(data, default=_default, option=self.options)
+        # Line/paragraph separators are valid JSON but not valid JavaScript
+        if b'\xe2\x80\xa8' in body or b'\xe2\x80\xa9' in body:
+            body = body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return body
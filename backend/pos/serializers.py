@@ -1,6 +1,18 @@
 from rest_framework import serializers
 from django.conf import settings
-from .models import MenuItem, MenuCategory, Order, OrderItem
+from django.db import transaction
+from django.db.models import Prefetch
+from .models import ArchivedOrder, ArchivedOrderItem, BillJob, MenuItem, MenuCategory, Order, OrderItem
+
+
+def orders_with_items():
+    """Orders with everything OrderSerializer touches loaded up front.
+
+    One query for orders (+ waiter) and one for all their items (+ menu item
+    and category), however many orders are listed.
+    """
+    items = OrderItem.objects.select_related('menu_item__category').order_by('id')
+    return Order.objects.select_related('waiter').prefetch_related(Prefetch('items', queryset=items))
 
 
 class UserTinySerializer(serializers.Serializer):
@@ -31,7 +43,8 @@ class MenuItemSerializer(serializers.ModelSerializer):
 
 class OrderItemSerializer(serializers.ModelSerializer):
     menu_item = MenuItemSerializer(read_only=True)
-    menu_item_id = serializers.PrimaryKeyRelatedField(queryset=MenuItem.objects.all(), write_only=True, source='menu_item')
+    # Resolved to MenuItem objects in bulk by OrderSerializer.validate_items
+    menu_item_id = serializers.IntegerField(write_only=True)
     unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
 
     class Meta:
@@ -41,28 +54,130 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
-    total = serializers.SerializerMethodField()
     waiter = serializers.SerializerMethodField()
 
     class Meta:
         model = Order
-        fields = ['id', 'guest_name', 'table_number', 'waiter', 'status', 'created_at', 'items', 'total']
-
-    def get_total(self, obj):
-        return obj.total()
+        fields = ['id', 'guest_name', 'table_number', 'waiter', 'status', 'created_at', 'updated_at', 'items', 'total', 'item_count']
 
     def get_waiter(self, obj):
         if obj.waiter:
             return UserTinySerializer(obj.waiter).data
         return None
 
+    def validate_items(self, items):
+        menu_items = MenuItem.objects.in_bulk({item['menu_item_id'] for item in items})
+        errors = []
+        for item in items:
+            menu_item = menu_items.get(item['menu_item_id'])
+            if menu_item is None:
+                errors.append({'menu_item_id': [f'Invalid pk "{item["menu_item_id"]}" - object does not exist.']})
+            else:
+                item['menu_item'] = menu_item
+                errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
-        # waiter will be set in the view (from request.user) where appropriate
-        order = Order.objects.create(**validated_data)
-        for item in items_data:
-            menu_item = item.get('menu_item')
-            quantity = item.get('quantity', 1)
-            unit_price = getattr(menu_item, 'price', 0)
-            OrderItem.objects.create(order=order, menu_item=menu_item, quantity=quantity, unit_price=unit_price)
+        # waiter is passed in by the view (from request.user) where appropriate
+        items = [
+            OrderItem(menu_item=item['menu_item'], quantity=item.get('quantity', 1), unit_price=item['menu_item'].price)
+            for item in items_data
+        ]
+        with transaction.atomic():
+            order = Order.objects.create(
+                total=sum(item.total_price() for item in items),
+                item_count=sum(item.quantity for item in items),
+                **validated_data,
+            )
+            for item in items:
+                item.order = order
+            # bulk_create skips OrderItem.save(), so totals are set on the insert above
+            OrderItem.objects.bulk_create(items)
         return order
+
+
+class BillJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BillJob
+        fields = ['id', 'order', 'kind', 'email', 'status', 'attempts', 'max_attempts', 'run_after',
+                  'last_error', 'created_at', 'updated_at']
+
+
+class ArchivedOrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedOrderItem
+        fields = ['id', 'menu_item_id', 'menu_item_name', 'quantity', 'unit_price']
+
+
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    items = ArchivedOrderItemSerializer(many=True, read_only=True)
+    waiter = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedOrder
+        fields = ['id', 'guest_name', 'table_number', 'waiter', 'status', 'created_at', 'updated_at',
+                  'archived_at', 'items', 'total', 'item_count']
+        read_only_fields = fields
+
+    def get_waiter(self, obj):
+        if obj.waiter:
+            return UserTinySerializer(obj.waiter).data
+        return None
+
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _money(value):
+    return f'{value:.2f}'
+
+
+def serialize_orders_compact(orders):
+    """Read-only fast path for order lists, bypassing DRF field machinery.
+
+    Items reference menu items by id; each distinct menu item and category is
+    returned once in side-loaded dictionaries. Expects orders_with_items() rows.
+    Returns (orders, {'menu_items': {...}, 'categories': {...}}).
+    """
+    to_datetime = _datetime_field.to_representation
+    menu_items = {}
+    categories = {}
+    results = []
+    for order in orders:
+        items = []
+        for item in order.items.all():
+            if item.menu_item_id not in menu_items:
+                menu_item = item.menu_item
+                category = menu_item.category
+                if category.id not in categories:
+                    categories[category.id] = {
+                        'id': category.id, 'name': category.name,
+                        'description': category.description, 'order': category.order,
+                    }
+                menu_items[menu_item.id] = {
+                    'id': menu_item.id, 'category_id': menu_item.category_id, 'name': menu_item.name,
+                    'description': menu_item.description, 'price': _money(menu_item.price),
+                    'is_vegetarian': menu_item.is_vegetarian, 'is_vegan': menu_item.is_vegan,
+                    'spice_level': menu_item.spice_level, 'is_available': menu_item.is_available,
+                }
+            items.append({
+                'id': item.id, 'menu_item_id': item.menu_item_id,
+                'quantity': item.quantity, 'unit_price': _money(item.unit_price),
+            })
+        waiter = order.waiter
+        results.append({
+            'id': order.id,
+            'guest_name': order.guest_name,
+            'table_number': order.table_number,
+            'waiter': {'id': waiter.id, 'username': waiter.username, 'role': waiter.role} if waiter else None,
+            'status': order.status,
+            'created_at': to_datetime(order.created_at),
+            'updated_at': to_datetime(order.updated_at),
+            'items': items,
+            'total': _money(order.total),
+            'item_count': order.item_count,
+        })
+    return results, {'menu_items': menu_items, 'categories': categories}
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import menu_cache
+from .authentication import bump_user_version, token_cache
+from .models import MenuCategory, MenuItem, User
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=MenuCategory)
+@receiver(post_delete, sender=MenuCategory)
+def menu_changed(sender, **kwargs):
+    transaction.on_commit(menu_cache.bump_version)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.evict(instance.key)
+    # Other processes learn about it through the shared cache, once the change is visible to them
+    transaction.on_commit(lambda: bump_user_version(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    token_cache.evict_user(instance.pk)
+    transaction.on_commit(lambda: bump_user_version(instance.pk))
@@ -0,0 +1,714 @@
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipIf
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import QuerySet
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import analytics, async_views, bills, renderers
+from .authentication import CachedTokenAuthentication, bump_user_version, get_user_version, token_cache
+from .compression import _accepted_encodings
+from .events import EventBroker, broker, publish_status
+from .menu_import import MenuImportError, normalize
+from .models import ArchivedOrder, BillJob, MenuCategory, MenuItem, Order, OrderItem, User
+from .renderers import FastJSONRenderer
+
+
+# The default cache is a file cache shared with the dev server; tests get their own
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pos-tests'}}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class POSTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.waiter = User.objects.create_user('waiter1', password='waiter123', role=User.ROLE_WAITER)
+        cls.chef = User.objects.create_user('chef1', password='chef123', role=User.ROLE_CHEF)
+        cls.reception = User.objects.create_user('reception1', password='reception123', role=User.ROLE_RECEPTION)
+        category = MenuCategory.objects.create(name='Curries', order=1)
+        cls.menu = [
+            MenuItem.objects.create(category=category, name=f'Dish {i}', price=Decimal('100.00') * (i + 1))
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def make_order(self, table_number='1', status=Order.STATUS_PENDING, items=2):
+        order = Order.objects.create(guest_name='Guest', table_number=table_number, waiter=self.waiter, status=status)
+        for menu_item in self.menu[:items]:
+            OrderItem.objects.create(order=order, menu_item=menu_item, quantity=2, unit_price=menu_item.price)
+        return order
+
+
+class OrderListQueryTests(POSTestCase):
+    def test_query_count_does_not_grow_with_orders(self):
+        client = self.client_for(self.reception)
+        client.get('/api/orders/')  # fills the token cache
+
+        self.make_order()
+        # One query for the orders (+ waiter), one for all their items (+ menu item, category)
+        with self.assertNumQueries(2):
+            response = client.get('/api/orders/')
+        self.assertEqual(len(response.data), 1)
+
+        for i in range(9):
+            self.make_order(table_number=str(i), items=3)
+        with self.assertNumQueries(2):
+            response = client.get('/api/orders/')
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(len(response.data[0]['items']), 3)
+
+
+    def test_compact_view_side_loads_each_menu_item_once(self):
+        client = self.client_for(self.reception)
+        for i in range(4):
+            self.make_order(table_number=str(i), items=3)
+        full = client.get('/api/orders/').json()
+
+        with self.assertNumQueries(2):
+            response = client.get('/api/orders/', {'view': 'compact'})
+        compact = response.json()
+        self.assertEqual(sorted(compact['menu_items']), sorted(str(item.id) for item in self.menu))
+        self.assertEqual(list(compact['categories']), [str(self.menu[0].category_id)])
+
+        # Same orders and lines as the full view, with menu items looked up by id
+        self.assertEqual(len(compact['results']), len(full))
+        for order, expected in zip(compact['results'], full):
+            self.assertEqual({k: v for k, v in order.items() if k != 'items'},
+                             {k: v for k, v in expected.items() if k != 'items'})
+            for item, expected_item in zip(order['items'], expected['items'], strict=True):
+                menu_item = compact['menu_items'][str(item['menu_item_id'])]
+                self.assertEqual(menu_item['name'], expected_item['menu_item']['name'])
+                self.assertEqual(compact['categories'][str(menu_item['category_id'])]['name'],
+                                 expected_item['menu_item']['category']['name'])
+                self.assertEqual((item['quantity'], item['unit_price']),
+                                 (expected_item['quantity'], expected_item['unit_price']))
+
+
+class OrderDeltaTests(POSTestCase):
+    def test_recent_changes_are_sent_again(self):
+        client = self.client_for(self.reception)
+        page = client.get('/api/orders/?limit=10').data
+        order = self.make_order()
+
+        # Rows stamped just before the cursor may still have been uncommitted
+        first = client.get('/api/orders/', {'since': page['since']}).data
+        self.assertEqual([o['id'] for o in first['results']], [order.id])
+        again = client.get('/api/orders/', {'since': first['cursor']}).data
+        self.assertEqual([o['id'] for o in again['results']], [order.id])
+
+
+class OrderTotalsTests(POSTestCase):
+    def test_item_changes_update_the_stored_totals(self):
+        order = self.make_order()
+        order.refresh_from_db()
+        self.assertEqual((order.total, order.item_count), (Decimal('600.00'), 4))
+
+        item = order.items.get(menu_item=self.menu[0])
+        item.quantity = 5
+        item.save()
+        order.refresh_from_db()
+        self.assertEqual((order.total, order.item_count), (Decimal('900.00'), 7))
+
+        item.delete()
+        order.refresh_from_db()
+        self.assertEqual((order.total, order.item_count), (Decimal('400.00'), 2))
+
+    def test_created_orders_carry_their_totals(self):
+        body = {'guest_name': 'Guest', 'table_number': '5',
+                'items': [{'menu_item_id': self.menu[0].id, 'quantity': 2},
+                          {'menu_item_id': self.menu[2].id, 'quantity': 1}]}
+        response = self.client_for(self.waiter).post('/api/orders/', body, format='json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertEqual((order.total, order.item_count), (Decimal('500.00'), 3))
+
+    def test_recalculate_checks_and_fixes_drift(self):
+        order = self.make_order()
+        Order.objects.filter(pk=order.pk).update(total=0, item_count=0)
+
+        with self.assertRaisesMessage(CommandError, '1 mismatched'):
+            call_command('recalculate_order_totals', '--check', stdout=StringIO())
+        order.refresh_from_db()
+        self.assertEqual(order.total, 0)
+
+        out = StringIO()
+        call_command('recalculate_order_totals', stdout=out)
+        self.assertIn('1 fixed', out.getvalue())
+        order.refresh_from_db()
+        self.assertEqual((order.total, order.item_count), (Decimal('600.00'), 4))
+        call_command('recalculate_order_totals', '--check', stdout=StringIO())
+
+
+@override_settings(POS_EVENT_MAX_STREAMS=1)
+class EventStreamLimitTests(POSTestCase):
+    def test_streams_past_the_cap_are_refused_until_one_closes(self):
+        first = self.client.get('/api/events/')
+        self.assertEqual(first.status_code, 200)
+        refused = self.client.get('/api/events/')
+        self.assertEqual(refused.status_code, 503)
+        self.assertIn('Retry-After', refused)
+
+        first.close()
+        second = self.client.get('/api/events/')
+        self.assertEqual(second.status_code, 200)
+        second.close()
+
+
+class TableStatsTests(POSTestCase):
+    def test_stats_take_three_queries(self):
+        self.make_order(table_number='1')
+        self.make_order(table_number='1', status=Order.STATUS_PREPARING)
+        self.make_order(table_number='2', status=Order.STATUS_READY, items=3)
+        self.make_order(table_number='3', status=Order.STATUS_CLOSED)
+
+        # Active orders, their items, one grouped count per status
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/tables/stats/')
+        data = response.json()
+        self.assertEqual(sorted(data['occupied_tables']), ['1', '2'])
+        self.assertEqual(len(data['occupied_tables']['1']), 2)
+        self.assertEqual(data['total_tables_occupied'], 2)
+        self.assertEqual((data['total_orders'], data['active_orders'], data['closed_orders']), (4, 3, 1))
+        self.assertEqual(data['status_breakdown'][Order.STATUS_PENDING], 1)
+        self.assertEqual(data['status_breakdown'][Order.STATUS_SERVED], 0)
+
+
+class KitchenOrdersTests(POSTestCase):
+    def test_active_orders_in_one_query(self):
+        self.make_order(table_number='1')
+        accepted = self.make_order(table_number='2', status=Order.STATUS_ACCEPTED)
+        ready = self.make_order(table_number='3', status=Order.STATUS_READY, items=3)
+        self.make_order(table_number='4', status=Order.STATUS_SERVED)
+        client = self.client_for(self.chef)
+        client.get('/api/kitchen/orders/')  # fills the token cache
+
+        for i in range(5):
+            self.make_order(table_number=f'p{i}', status=Order.STATUS_PREPARING)
+        with self.assertNumQueries(1):
+            response = client.get('/api/kitchen/orders/')
+        data = response.json()
+        self.assertEqual(len(data), 7)
+        self.assertEqual(data[0]['id'], accepted.id)
+        self.assertEqual(set(data[0]), {'id', 'table_number', 'status', 'created_at', 'elapsed_seconds', 'items'})
+        self.assertEqual(data[0]['items'], [{'name': 'Dish 0', 'quantity': 2}, {'name': 'Dish 1', 'quantity': 2}])
+        self.assertEqual(data[1]['id'], ready.id)
+        self.assertEqual(len(data[1]['items']), 3)
+
+
+class OrderStatusTests(POSTestCase):
+    def change_status(self, user, order_id, **body):
+        return self.client_for(user).post(f'/api/orders/{order_id}/status/', body, format='json')
+
+    def test_orders_advance_one_step_at_a_time(self):
+        order = self.make_order()
+        response = self.change_status(self.reception, order.id, status=Order.STATUS_ACCEPTED)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['previous_status'], Order.STATUS_PENDING)
+
+        response = self.change_status(self.chef, order.id, status=Order.STATUS_READY,
+                                      expected_status=Order.STATUS_ACCEPTED)
+        self.assertEqual(response.status_code, 400)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.STATUS_ACCEPTED)
+
+    def test_stale_expected_status_is_a_conflict(self):
+        order = self.make_order(status=Order.STATUS_PREPARING)
+        response = self.change_status(self.chef, order.id, status=Order.STATUS_PREPARING,
+                                      expected_status=Order.STATUS_ACCEPTED)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['current_status'], Order.STATUS_PREPARING)
+
+    def test_malformed_statuses_are_rejected(self):
+        order = self.make_order()
+        for body in ({'status': ['accepted']}, {'status': Order.STATUS_ACCEPTED, 'expected_status': ['pending']},
+                     {'status': Order.STATUS_ACCEPTED, 'expected_status': 'eaten'}):
+            response = self.change_status(self.reception, order.id, **body)
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_missing_order_is_not_found(self):
+        response = self.change_status(self.reception, 0, status=Order.STATUS_ACCEPTED)
+        self.assertEqual(response.status_code, 404)
+
+    def test_role_is_checked(self):
+        order = self.make_order()
+        response = self.change_status(self.chef, order.id, status=Order.STATUS_ACCEPTED)
+        self.assertEqual(response.status_code, 403)
+
+
+class BatchStatusTests(POSTestCase):
+    def test_each_change_gets_a_result(self):
+        accepted = self.make_order(status=Order.STATUS_ACCEPTED)
+        stale = self.make_order(status=Order.STATUS_READY)
+        response = self.client_for(self.chef).post('/api/orders/status/', {'changes': [
+            {'id': accepted.id, 'expected_status': Order.STATUS_ACCEPTED, 'status': Order.STATUS_PREPARING},
+            {'id': stale.id, 'expected_status': Order.STATUS_PREPARING, 'status': Order.STATUS_READY},
+            {'id': accepted.id, 'expected_status': ['accepted'], 'status': Order.STATUS_PREPARING},
+            {'id': stale.id, 'status': {'ready': True}},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['result'] for r in response.data['results']], ['ok', 'conflict', 'invalid', 'invalid'])
+        accepted.refresh_from_db()
+        self.assertEqual(accepted.status, Order.STATUS_PREPARING)
+
+    def test_orders_changed_before_the_update_are_conflicts(self):
+        first = self.make_order(status=Order.STATUS_ACCEPTED)
+        raced = self.make_order(status=Order.STATUS_ACCEPTED)
+        update = QuerySet.update
+
+        def racing_update(qs, **kwargs):
+            # Another chef moves `raced` on after the statuses were read, before the batch UPDATE
+            if qs.model is Order and kwargs.get('status') == Order.STATUS_PREPARING:
+                update(Order.objects.filter(pk=raced.pk), status=Order.STATUS_READY)
+            return update(qs, **kwargs)
+
+        with mock.patch('pos.views.publish_status') as publish, \
+                mock.patch.object(QuerySet, 'update', racing_update), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.chef).post('/api/orders/status/', {'changes': [
+                {'id': first.id, 'status': Order.STATUS_PREPARING},
+                {'id': raced.id, 'status': Order.STATUS_PREPARING},
+            ]}, format='json')
+        results = response.data['results']
+        self.assertEqual([r['result'] for r in results], ['ok', 'conflict'])
+        self.assertEqual(results[1]['current_status'], Order.STATUS_READY)
+        publish.assert_called_once_with(first.id, Order.STATUS_PREPARING)
+
+
+class BillTests(POSTestCase):
+    def test_preview_queues_nothing(self):
+        order = self.make_order(status=Order.STATUS_SERVED)
+        response = self.client_for(self.reception).get(f'/api/orders/{order.id}/bill/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pdf_url'], f'/api/orders/{order.id}/bill/pdf/')
+        self.assertFalse(BillJob.objects.exists())
+
+    def test_email_is_validated(self):
+        order = self.make_order(status=Order.STATUS_SERVED)
+        client = self.client_for(self.reception)
+        for email in ('not-an-email', ['guest@example.com']):
+            response = client.post(f'/api/orders/{order.id}/bill/', {'email': email}, format='json')
+            self.assertEqual(response.status_code, 400, email)
+        response = client.post(f'/api/orders/{order.id}/bill/', {'email': 'guest@example.com'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(BillJob.objects.get().email, 'guest@example.com')
+
+
+    def test_pdf_is_rendered_once_per_bill_content(self):
+        order = self.make_order(status=Order.STATUS_SERVED)
+        client = self.client_for(self.reception)
+        url = f'/api/orders/{order.id}/bill/pdf/'
+        with mock.patch.object(bills, 'render_pdf', wraps=bills.render_pdf) as render:
+            first = client.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first['Content-Type'], 'application/pdf')
+            self.assertTrue(first.content.startswith(b'%PDF'))
+            again = client.get(url)
+            self.assertEqual(again.content, first.content)
+            self.assertEqual(render.call_count, 1)
+
+            not_modified = client.get(url, headers={'If-None-Match': first['ETag']})
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(render.call_count, 1)
+
+        Order.objects.filter(pk=order.pk).update(status=Order.STATUS_CLOSED)
+        self.assertNotEqual(client.get(url)['ETag'], first['ETag'])
+        closed = client.get(url)['ETag']
+        OrderItem.objects.create(order=order, menu_item=self.menu[2], quantity=1, unit_price=self.menu[2].price)
+        self.assertNotEqual(client.get(url)['ETag'], closed)
+
+
+class TokenCacheTests(POSTestCase):
+    def test_hits_authenticate_like_misses(self):
+        token = Token.objects.create(user=self.waiter)
+        auth = CachedTokenAuthentication()
+        user, miss = auth.authenticate_credentials(token.key)
+        with self.assertNumQueries(0):
+            cached_user, hit = auth.authenticate_credentials(token.key)
+        self.assertEqual(cached_user.pk, user.pk)
+        self.assertIsInstance(hit, Token)
+        self.assertEqual((hit.key, hit.user_id), (miss.key, miss.user_id))
+
+    def test_logout_evicts_the_token(self):
+        client = self.client_for(self.waiter)
+        self.assertEqual(client.get('/api/auth/me/').status_code, 200)
+        self.assertEqual(client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(client.get('/api/auth/me/').status_code, 401)
+
+    def test_deactivating_a_user_evicts_their_tokens(self):
+        client = self.client_for(self.waiter)
+        self.assertEqual(client.get('/api/auth/me/').status_code, 200)
+        self.waiter.is_active = False
+        self.waiter.save()
+        self.assertEqual(client.get('/api/auth/me/').status_code, 401)
+
+    def test_changes_in_another_process_invalidate_the_entry(self):
+        token = Token.objects.create(user=self.waiter)
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(token.key)
+
+        # Another worker deactivates the user: only the version in the shared cache moves here
+        User.objects.filter(pk=self.waiter.pk).update(is_active=False)
+        with self.assertNumQueries(0):
+            auth.authenticate_credentials(token.key)
+        bump_user_version(self.waiter.pk)
+        with self.assertRaises(AuthenticationFailed):
+            auth.authenticate_credentials(token.key)
+
+    def test_saving_a_user_bumps_the_shared_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reception.save()
+        first = get_user_version(self.reception.pk)
+        self.assertIsNotNone(first)
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.create(user=self.reception).delete()
+        self.assertNotEqual(get_user_version(self.reception.pk), first)
+
+
+class RenderingTests(POSTestCase):
+    def test_raw_datetimes_render_like_drf(self):
+        value = {'at': datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc), 'day': date(2026, 1, 2)}
+        self.assertEqual(FastJSONRenderer().render(value), JSONRenderer().render(value))
+
+    @skipIf(renderers.orjson is None, 'orjson is not installed')
+    def test_orjson_and_fallback_render_the_same_bytes(self):
+        self.make_order()
+        orders = self.client_for(self.reception).get('/api/orders/').data
+        value = {'orders': orders, 'revenue': Decimal('1200.00'), 'n': 3, 'ratio': 0.25, 'ok': True, 'none': None,
+                 'at': datetime(2026, 1, 2, 3, 4, 5, 120000, tzinfo=dt_timezone.utc), 'by_id': {1: 'one'},
+                 'text': 'Paneer \u2028 Tikka, ₹ "spicy"'}
+        fast = FastJSONRenderer().render(value)
+        with mock.patch.object(renderers, 'orjson', None):
+            fallback = FastJSONRenderer().render(value)
+        self.assertEqual(fast, fallback)
+        self.assertIn(b'"revenue":"1200.00"', fallback)
+
+    def test_refused_encodings_are_not_used(self):
+        self.assertEqual(_accepted_encodings('gzip;q=0, br;q=0.5'), {'br'})
+        self.assertEqual(_accepted_encodings('gzip; q=0.0, *'), {'br'})
+        self.assertEqual(_accepted_encodings('identity'), set())
+        self.assertEqual(_accepted_encodings('GZIP, br;q=bad'), {'gzip'})
+
+
+class MenuImportTests(TestCase):
+    def row(self, **fields):
+        return {'category': 'Breads', 'name': 'Naan', 'price': '40', **fields}
+
+    def test_blank_flags_fall_back_to_defaults(self):
+        _, _, fields = normalize(self.row(is_available='', is_vegetarian=' '))
+        self.assertTrue(fields['is_available'])
+        self.assertFalse(fields['is_vegetarian'])
+        _, _, fields = normalize(self.row(is_available='no'))
+        self.assertFalse(fields['is_available'])
+
+    def test_non_finite_and_negative_prices_are_rejected(self):
+        for price in ('NaN', 'sNaN', 'Infinity', '-1', 'abc', None):
+            with self.assertRaises(MenuImportError, msg=price):
+                normalize(self.row(price=price))
+        self.assertEqual(normalize(self.row(price='12.5'))[2]['price'], Decimal('12.50'))
+
+    def test_populate_menu_reports_only_inserted_categories(self):
+        MenuCategory.objects.create(name='Breads')
+        get_or_create = QuerySet.get_or_create
+
+        def concurrent_desserts(qs, **kwargs):
+            # Another run inserts Desserts after this one read the existing names
+            if qs.model is MenuCategory and kwargs['name'] == 'Desserts':
+                MenuCategory.objects.create(name='Desserts')
+            return get_or_create(qs, **kwargs)
+
+        out = StringIO()
+        with mock.patch.object(QuerySet, 'get_or_create', concurrent_desserts):
+            call_command('populate_menu', stdout=out)
+        output = out.getvalue()
+        self.assertIn('Created category: Appetizers', output)
+        self.assertNotIn('Created category: Breads', output)
+        self.assertNotIn('Created category: Desserts', output)
+
+    def test_menu_benchmarks_need_confirmation_and_debug(self):
+        for command in ('benchmark_menu_import', 'benchmark_menu_search'):
+            with self.assertRaisesMessage(CommandError, '--seed-menu'):
+                call_command(command, '--items', '10', stdout=StringIO())
+            with self.settings(DEBUG=False), self.assertRaisesMessage(CommandError, 'DEBUG off'):
+                call_command(command, '--items', '10', '--seed-menu', stdout=StringIO())
+        self.assertFalse(MenuItem.objects.exists())
+
+
+class IdempotentOrderTests(POSTestCase):
+    def order_body(self, table_number='5'):
+        return {'guest_name': 'Guest', 'table_number': table_number,
+                'items': [{'menu_item_id': self.menu[0].id, 'quantity': 2}]}
+
+    def submit(self, client, key, body):
+        return client.post('/api/orders/', body, format='json', headers={'Idempotency-Key': key})
+
+    def test_retry_replays_the_first_response(self):
+        client = self.client_for(self.waiter)
+        first = self.submit(client, 'tablet-1:1', self.order_body())
+        self.assertEqual(first.status_code, 201)
+        retry = self.submit(client, 'tablet-1:1', self.order_body())
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_another_body_is_rejected(self):
+        client = self.client_for(self.waiter)
+        self.submit(client, 'tablet-1:1', self.order_body())
+        response = self.submit(client, 'tablet-1:1', self.order_body(table_number='6'))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_batch_flush_creates_each_order_once(self):
+        client = self.client_for(self.waiter)
+        queued = {'orders': [{'idempotency_key': f'tablet-1:{i}', **self.order_body(str(i))} for i in range(3)]}
+        first = client.post('/api/orders/batch/', queued, format='json')
+        self.assertEqual([r['replayed'] for r in first.data['results']], [False] * 3)
+        again = client.post('/api/orders/batch/', queued, format='json')
+        self.assertEqual([r['replayed'] for r in again.data['results']], [True] * 3)
+        self.assertEqual(Order.objects.count(), 3)
+
+
+class SalesRollupTests(POSTestCase):
+    def close(self, order):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.reception).post(
+                f'/api/orders/{order.id}/status/', {'status': Order.STATUS_CLOSED}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_closes_add_to_the_rollups(self):
+        # Two orders of 2 x 100 + 2 x 200
+        for order in (self.make_order(status=Order.STATUS_SERVED), self.make_order(status=Order.STATUS_SERVED)):
+            self.close(order)
+        self.make_order(status=Order.STATUS_SERVED)
+
+        data = self.client_for(self.reception).get('/api/analytics/sales/', {'group_by': 'item'}).json()
+        self.assertEqual(data['totals'], {'revenue': '1200.00', 'quantity': 8, 'orders': 2})
+        self.assertEqual([(r['label'], r['revenue'], r['quantity']) for r in data['results']],
+                         [('Dish 1', '800.00', 4), ('Dish 0', '400.00', 4)])
+
+        analytics.rebuild_all()
+        rebuilt = self.client_for(self.reception).get('/api/analytics/sales/', {'group_by': 'item'}).json()
+        self.assertEqual(rebuilt, data)
+
+    def test_bad_dates_are_rejected(self):
+        client = self.client_for(self.reception)
+        for params in ({'from': '2026-02-30'}, {'to': '2026-1-5'}, {'from': '2026-03-02', 'to': '2026-03-01'}):
+            response = client.get('/api/analytics/sales/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_rollup_failures_do_not_fail_the_close(self):
+        order = self.make_order(status=Order.STATUS_SERVED)
+        with mock.patch('pos.analytics._add', side_effect=RuntimeError('rollups down')), \
+                self.assertLogs('pos.analytics', 'ERROR'):
+            self.close(order)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.STATUS_CLOSED)
+
+
+class MenuSearchTests(POSTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.mains = MenuCategory.objects.create(name='Mains', order=2)
+        for name, price, veg, vegan, spice in [
+            ('Paneer Tikka', '250', True, False, 'medium'),
+            ('Paneer Butter Masala', '300', True, False, 'mild'),
+            ('Chicken Tikka', '350', False, False, 'hot'),
+            ('Dal Tadka', '150', True, True, 'mild'),
+        ]:
+            MenuItem.objects.create(category=cls.mains, name=name, price=Decimal(price), is_vegetarian=veg,
+                                    is_vegan=vegan, spice_level=spice)
+        MenuItem.objects.create(category=cls.mains, name='Paneer Pakora', price=Decimal('200'), is_available=False)
+
+    def search(self, **params):
+        response = self.client.get('/api/menu/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [item['name'] for item in response.data['results']], response.data['more']
+
+    def test_word_prefixes_match_available_items(self):
+        # Names starting with the query rank first
+        self.assertEqual(self.search(q='pan'), (['Paneer Butter Masala', 'Paneer Tikka'], False))
+        self.assertEqual(self.search(q='tik'), (['Chicken Tikka', 'Paneer Tikka'], False))
+        self.assertEqual(self.search(q='paneer tik'), (['Paneer Tikka'], False))
+
+    def test_typos_fall_back_to_trigram_matching(self):
+        names, _ = self.search(q='panner tika')
+        self.assertEqual(names[0], 'Paneer Tikka')
+        self.assertEqual(self.search(q='xyzzy'), ([], False))
+
+    def test_filters(self):
+        self.assertEqual(self.search(q='tikka', is_vegetarian='true'), (['Paneer Tikka'], False))
+        self.assertEqual(self.search(is_vegan='true'), (['Dal Tadka'], False))
+        self.assertEqual(self.search(category=self.mains.id, spice_level='mild'),
+                         (['Dal Tadka', 'Paneer Butter Masala'], False))
+        self.assertEqual(self.search(category=self.mains.id, min_price='200', max_price='300'),
+                         (['Paneer Butter Masala', 'Paneer Tikka'], False))
+
+    def test_paging(self):
+        self.assertEqual(self.search(category=self.mains.id, limit=2), (['Chicken Tikka', 'Dal Tadka'], True))
+        self.assertEqual(self.search(category=self.mains.id, limit=2, offset=2),
+                         (['Paneer Butter Masala', 'Paneer Tikka'], False))
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({'min_price': 'NaN'}, {'max_price': 'Infinity'}, {'min_price': 'abc'},
+                       {'spice_level': 'volcanic'}, {'limit': 'ten'}, {'is_vegan': 'maybe'}):
+            response = self.client.get('/api/menu/search/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_index_is_rebuilt_when_the_menu_changes(self):
+        self.assertEqual(self.search(q='kulfi'), ([], False))
+        # Saving bumps the menu version once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.create(category=self.mains, name='Kulfi', price=Decimal('120'))
+        self.assertEqual(self.search(q='kulfi'), (['Kulfi'], False))
+
+
+class ArchiveTests(POSTestCase):
+    def setUp(self):
+        super().setUp()
+        self.old = [self.make_order(table_number=str(i), status=Order.STATUS_CLOSED) for i in (1, 2)]
+        self.recent = self.make_order(status=Order.STATUS_CLOSED)
+        self.active = self.make_order(status=Order.STATUS_SERVED)
+        Order.objects.filter(pk__in=[o.pk for o in self.old]).update(updated_at=timezone.now() - timedelta(days=100))
+        Order.objects.filter(pk=self.old[0].pk).update(created_at=timezone.now() - timedelta(days=101))
+
+    def test_archive_lists_and_filters(self):
+        call_command('archive_orders', days=90, stdout=StringIO())
+        self.assertEqual(set(Order.objects.values_list('pk', flat=True)), {self.recent.pk, self.active.pk})
+        self.assertFalse(OrderItem.objects.filter(order_id__in=[o.pk for o in self.old]).exists())
+
+        client = self.client_for(self.reception)
+        data = client.get('/api/archive/orders/').data
+        self.assertEqual([o['id'] for o in data['results']], [self.old[1].pk, self.old[0].pk])
+        self.assertEqual(data['results'][0]['total'], '600.00')
+        self.assertEqual(len(data['results'][0]['items']), 2)
+
+        self.assertEqual([o['id'] for o in client.get('/api/archive/orders/', {'table_number': '1'}).data['results']],
+                         [self.old[0].pk])
+        today = timezone.localdate().isoformat()
+        self.assertEqual([o['id'] for o in client.get('/api/archive/orders/', {'from': today}).data['results']],
+                         [self.old[1].pk])
+        detail = client.get(f'/api/archive/orders/{self.old[0].pk}/')
+        self.assertEqual(detail.data['items'][0]['menu_item_name'], 'Dish 0')
+
+    def test_impossible_dates_are_rejected(self):
+        client = self.client_for(self.reception)
+        for value in ('2026-02-30', '2026-13-01', 'yesterday'):
+            response = client.get('/api/archive/orders/', {'from': value})
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_dry_run_leaves_orders_in_place(self):
+        out = StringIO()
+        call_command('archive_orders', days=90, dry_run=True, stdout=out)
+        self.assertIn('2 closed orders', out.getvalue())
+        self.assertEqual(Order.objects.count(), 4)
+        self.assertEqual(OrderItem.objects.count(), 8)
+        self.assertFalse(ArchivedOrder.objects.exists())
+
+
+class EventResumeTests(POSTestCase):
+    def first_events(self, last_event_id, count):
+        response = self.client.get('/api/events/', HTTP_LAST_EVENT_ID=last_event_id)
+        chunks = iter(response.streaming_content)
+        events = [next(chunks).decode() for _ in range(count)]
+        response.close()
+        return events
+
+    def test_resumes_after_the_last_event_seen(self):
+        publish_status(1, Order.STATUS_READY)
+        seen = f'{broker.epoch}-{broker.last_id}'
+        publish_status(2, Order.STATUS_SERVED)
+        retry, event = self.first_events(seen, 2)
+        self.assertTrue(retry.startswith('retry:'))
+        self.assertIn('event: order_status\ndata: {"id": 2, "status": "served"}', event)
+
+    def test_ids_from_before_a_restart_ask_for_a_reload(self):
+        publish_status(1, Order.STATUS_READY)
+        # Another epoch, or a sequence this process never reached
+        for stale in (f'0badc0de-{broker.last_id}', f'{broker.epoch}-{broker.last_id + 100}'):
+            _, event = self.first_events(stale, 2)
+            self.assertEqual(event, f'id: {broker.epoch}-{broker.last_id}\nevent: reset\ndata: {{}}\n\n')
+
+    def test_malformed_ids_replay_the_history(self):
+        events = EventBroker()
+        events.publish('order_status', {'id': 1, 'status': Order.STATUS_READY})
+        for malformed in ('nonsense', f'{events.epoch}-x', '-', '12'):
+            self.assertEqual(events.resume_point(malformed), (0, False), malformed)
+        self.assertEqual(events.resume_point(None), (1, False))
+
+
+class MenuCacheTests(POSTestCase):
+    def test_unchanged_menu_is_not_modified(self):
+        for path in ('/api/menu/', '/api/menu/categories/'):
+            first = self.client.get(path)
+            self.assertEqual(first.status_code, 200)
+            with self.assertNumQueries(0):
+                again = self.client.get(path, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(again.status_code, 304)
+            self.assertEqual(again['ETag'], first['ETag'])
+
+    def test_saving_or_deleting_menu_rows_changes_the_etag(self):
+        etag = self.client.get('/api/menu/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu[0].price = Decimal('150.00')
+            self.menu[0].save()
+        response = self.client.get('/api/menu/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['price'], '150.00')
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu[2].delete()
+        response = self.client.get('/api/menu/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+
+class AsyncViewParityTests(POSTestCase):
+    def setUp(self):
+        super().setUp()
+        for i, order_status in enumerate((Order.STATUS_PENDING, Order.STATUS_PREPARING, Order.STATUS_CLOSED,
+                                          Order.STATUS_READY)):
+            self.make_order(table_number=str(i % 2), status=order_status, items=i % 3 + 1)
+        self.client = self.client_for(self.reception)
+        self.token = Token.objects.get(user=self.reception).key
+
+    async def test_async_views_return_the_same_json(self):
+        factory = RequestFactory()
+        # Pin the clock, so both sides hand out the same delta cursors
+        now = timezone.now() + timedelta(hours=1)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            for path, async_view in [
+                ('/api/orders/', async_views.orders_list_create),
+                ('/api/orders/?view=compact', async_views.orders_list_create),
+                ('/api/orders/?status=pending', async_views.orders_list_create),
+                ('/api/orders/?limit=2', async_views.orders_list_create),
+                ('/api/orders/?limit=2&view=compact', async_views.orders_list_create),
+                ('/api/orders/?since=&limit=3', async_views.orders_list_create),
+                ('/api/orders/?cursor=bogus', async_views.orders_list_create),
+                ('/api/tables/stats/', async_views.table_stats),
+                ('/api/menu/', async_views.menu_list),
+            ]:
+                expected = await sync_to_async(self.client.get)(path)
+                response = await async_view(factory.get(path, HTTP_AUTHORIZATION=f'Token {self.token}'))
+                self.assertEqual(response.status_code, expected.status_code, path)
+                self.assertEqual(json.loads(response.content), expected.json(), path)
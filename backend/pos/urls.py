@@ -1,6 +1,12 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.POS_ASYNC_VIEWS:
+    from . import async_views as polling_views
+else:
+    polling_views = views
+
 urlpatterns = [
     # Authentication
     path('auth/login/', views.login_view, name='login'),
@@ -9,12 +15,22 @@ urlpatterns = [
     
     # Menu
     path('menu/categories/', views.menu_categories, name='menu-categories'),
-    path('menu/', views.menu_list, name='menu-list'),
+    path('menu/', polling_views.menu_list, name='menu-list'),
+    path('menu/search/', views.menu_search_view, name='menu-search'),
     
     # Orders
-    path('orders/', views.orders_list_create, name='orders-list-create'),
+    path('orders/', polling_views.orders_list_create, name='orders-list-create'),
+    path('orders/status/', views.orders_batch_status, name='orders-batch-status'),
+    path('orders/batch/', views.orders_batch_create, name='orders-batch-create'),
     path('orders/<int:pk>/', views.order_detail, name='order-detail'),
     path('orders/<int:pk>/status/', views.order_change_status, name='order-change-status'),
     path('orders/<int:pk>/bill/', views.order_bill, name='order-bill'),
-    path('tables/stats/', views.table_stats, name='table-stats'),
+    path('orders/<int:pk>/bill/pdf/', views.order_bill_pdf, name='order-bill-pdf'),
+    path('bill-jobs/<int:pk>/', views.bill_job_detail, name='bill-job-detail'),
+    path('events/', polling_views.order_events, name='order-events'),
+    path('archive/orders/', views.archived_orders_list, name='archived-orders-list'),
+    path('archive/orders/<int:pk>/', views.archived_order_detail, name='archived-order-detail'),
+    path('analytics/sales/', views.sales_analytics, name='sales-analytics'),
+    path('kitchen/orders/', views.kitchen_orders, name='kitchen-orders'),
+    path('tables/stats/', polling_views.table_stats, name='table-stats'),
 ]
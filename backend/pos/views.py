@@ -1,19 +1,39 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, login, logout
 from django.shortcuts import get_object_or_404
-from django.core.mail import EmailMessage
+from django.urls import reverse
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from django.db import transaction
+from django.db.models import Count
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 from django.utils.decorators import method_decorator
-import io
-from reportlab.pdfgen import canvas
+import base64
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 
-from .models import MenuItem, MenuCategory, Order, User
-from .serializers import MenuItemSerializer, MenuCategorySerializer, OrderSerializer, UserTinySerializer
+from .models import ArchivedOrder, BillJob, MenuItem, MenuCategory, Order, OrderItem, User
+from .serializers import (ArchivedOrderSerializer, BillJobSerializer, MenuItemSerializer, MenuCategorySerializer, OrderSerializer, UserTinySerializer,
+                          orders_with_items, serialize_orders_compact)
+from . import analytics, bills, idempotency, menu_cache, menu_search, metrics
+from .menu_import import SPICE_LEVELS
+from .events import broker, format_event, format_reset, publish_order, publish_status, stream_limit
+from .pagination import InvalidCursor, changes_horizon, changes_since, keyset_page, parse_limit
+
+ORDERS_PAGE_SIZE = 50
+ORDERS_MAX_PAGE_SIZE = 200
+ORDERS_DELTA_LIMIT = 500
 
 
 def _has_role(user, allowed_roles):
@@ -76,22 +96,45 @@ def current_user(request):
     })
 
 
+def _etag_matches(request, etag):
+    """Weak If-None-Match comparison, so compressed (W/) ETags still match"""
+    def opaque(tag):
+        return tag[2:] if tag.startswith('W/') else tag
+    return opaque(etag) in {opaque(tag) for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+
+
+def _cached_menu_response(request, kind, build):
+    """Serve a menu payload from the versioned cache, honouring If-None-Match"""
+    version = menu_cache.get_version()
+    etag = menu_cache.etag_for(kind, version)
+    if _etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(menu_cache.get_payload(kind, version, build))
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @api_view(['GET'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def menu_categories(request):
     """List all menu categories"""
-    categories = MenuCategory.objects.all()
-    serializer = MenuCategorySerializer(categories, many=True)
-    return Response(serializer.data)
+    return _cached_menu_response(
+        request, 'categories',
+        lambda: MenuCategorySerializer(MenuCategory.objects.all(), many=True).data,
+    )
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
 def menu_list(request):
     if request.method == 'GET':
-        items = MenuItem.objects.filter(is_available=True).select_related('category')
-        serializer = MenuItemSerializer(items, many=True)
-        return Response(serializer.data)
+        return _cached_menu_response(
+            request, 'items',
+            lambda: MenuItemSerializer(MenuItem.objects.filter(is_available=True).select_related('category'), many=True).data,
+        )
 
     # Only staff can add menu items
     if not request.user.is_authenticated or not request.user.is_staff:
@@ -104,142 +147,562 @@ def menu_list(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+MENU_SEARCH_LIMIT = 50
+MENU_SEARCH_MAX_LIMIT = 200
+
+
+def _parse_flag(value):
+    if value is None or value == '':
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(value)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def menu_search_view(request):
+    """Search available menu items by name and filters.
+
+    Query params: q (word prefix, falls back to fuzzy matching), category (id),
+    is_vegetarian, is_vegan, spice_level, min_price, max_price, offset, limit.
+    """
+    params = request.query_params
+    filters = {}
+    try:
+        for param in ('is_vegetarian', 'is_vegan'):
+            filters[param] = _parse_flag(params.get(param))
+        if params.get('category'):
+            filters['category'] = int(params['category'])
+        if params.get('spice_level'):
+            if params['spice_level'] not in SPICE_LEVELS:
+                raise ValueError
+            filters['spice_level'] = params['spice_level']
+        for param in ('min_price', 'max_price'):
+            if params.get(param):
+                filters[param] = Decimal(params[param])
+                # NaN / Infinity parse but can't be compared with prices
+                if not filters[param].is_finite():
+                    raise ValueError
+        offset = max(int(params.get('offset') or 0), 0)
+        limit = parse_limit(params.get('limit'), MENU_SEARCH_LIMIT, MENU_SEARCH_MAX_LIMIT)
+    except (ValueError, InvalidOperation):
+        return Response({'error': 'invalid filter: category, offset and limit must be integers, prices numbers, '
+                                  'is_vegetarian / is_vegan true or false, spice_level one of '
+                                  + ', '.join(sorted(SPICE_LEVELS))},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    results, more = menu_search.get_index().search(params.get('q', '').strip(), offset=offset, limit=limit, **filters)
+    return Response({'results': results, 'more': more})
+
+
+def _orders_payload(rows, compact):
+    """{'results': [...]} for a page of orders; compact adds side-loaded menu dictionaries"""
+    with metrics.timer('serialize'):
+        if compact:
+            results, menu = serialize_orders_compact(rows)
+            return {'results': results, **menu}
+        return {'results': OrderSerializer(rows, many=True).data}
+
+
+def _orders_queryset(params):
+    qs = orders_with_items()
+    if params.get('status'):
+        qs = qs.filter(status=params['status'])
+    return qs
+
+
+def _orders_list_mode(params):
+    """('delta' | 'page' | 'all', limit) for GET /orders/ params; raises InvalidCursor for a bad limit"""
+    # Delta mode: only orders created or modified after the client's cursor
+    if 'since' in params:
+        return 'delta', parse_limit(params.get('limit'), ORDERS_DELTA_LIMIT, ORDERS_DELTA_LIMIT)
+    # Keyset pagination, newest first; `since` starts a delta feed from the page
+    if 'limit' in params or 'cursor' in params:
+        return 'page', parse_limit(params.get('limit'), ORDERS_PAGE_SIZE, ORDERS_MAX_PAGE_SIZE)
+    return 'all', None
+
+
+def _orders_list_data(rows, compact, paging=None):
+    """GET /orders/ data: a bare list for the full listing, else {'results': ..., **paging}"""
+    if paging is None and not compact:
+        with metrics.timer('serialize'):
+            return OrderSerializer(rows, many=True).data
+    return {**_orders_payload(rows, compact), **(paging or {})}
+
+
 @api_view(['GET', 'POST'])
 def orders_list_create(request):
     if request.method == 'GET':
-        status_q = request.query_params.get('status')
-        qs = Order.objects.all().order_by('-created_at')
-        if status_q:
-            qs = qs.filter(status=status_q)
-        serializer = OrderSerializer(qs, many=True)
-        return Response(serializer.data)
+        params = request.query_params
+        qs = _orders_queryset(params)
+        try:
+            mode, limit = _orders_list_mode(params)
+            if mode == 'delta':
+                rows, cursor, has_more = changes_since(qs, params.get('since'), limit)
+                paging = {'cursor': cursor, 'has_more': has_more}
+            elif mode == 'page':
+                since = changes_horizon()
+                rows, next_cursor = keyset_page(qs, params.get('cursor'), limit)
+                paging = {'next': next_cursor, 'since': since}
+            else:
+                rows, paging = qs.order_by('-created_at'), None
+        except InvalidCursor as e:
+            return Response({'error': f'invalid cursor: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(_orders_list_data(rows, params.get('view') == 'compact', paging))
 
     # Only waiters may create orders (or superusers)
     if not _has_role(request.user, ['waiter']):
         return Response({'detail': 'Authentication with waiter role required'}, status=status.HTTP_403_FORBIDDEN)
 
-    serializer = OrderSerializer(data=request.data)
-    if serializer.is_valid():
-        order = serializer.save()
-        # attach waiter
-        order.waiter = request.user
-        order.save()
-        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    key = request.headers.get('Idempotency-Key')
+    if key is None:
+        status_code, data = _create_order(request.user, request.data)
+        return Response(data, status=status_code)
+    if not key or len(key) > idempotency.MAX_KEY_LENGTH:
+        return Response({'error': f'Idempotency-Key must be 1-{idempotency.MAX_KEY_LENGTH} characters'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    status_code, data, replayed = idempotency.run_once(
+        request.user, key, request.data, lambda: _create_order(request.user, request.data))
+    response = Response(data, status=status_code)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _create_order(user, data):
+    """(status_code, response data) for creating an order from `data`"""
+    serializer = OrderSerializer(data=data)
+    if not serializer.is_valid():
+        return status.HTTP_400_BAD_REQUEST, serializer.errors
+    order = serializer.save(waiter=user)
+    transaction.on_commit(lambda: publish_order('order_created', order))
+    order = orders_with_items().get(pk=order.pk)
+    return status.HTTP_201_CREATED, OrderSerializer(order).data
+
+
+ORDERS_MAX_SUBMIT_BATCH = 50
+
+
+@api_view(['POST'])
+def orders_batch_create(request):
+    """Create several orders queued offline by a waiter tablet.
+
+    Body: {"orders": [{"idempotency_key": "...", "guest_name": ..., "table_number": ..., "items": [...]}, ...]}
+    Each order is created in its own transaction under its idempotency key, so
+    flushing the same queue again replays the stored results instead of
+    creating duplicates.
+    """
+    if not _has_role(request.user, ['waiter']):
+        return Response({'detail': 'Authentication with waiter role required'}, status=status.HTTP_403_FORBIDDEN)
+    orders = request.data.get('orders')
+    if not isinstance(orders, list) or not orders:
+        return Response({'error': 'orders must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(orders) > ORDERS_MAX_SUBMIT_BATCH:
+        return Response({'error': f'at most {ORDERS_MAX_SUBMIT_BATCH} orders per request'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    keys = [entry.get('idempotency_key') for entry in orders if isinstance(entry, dict)]
+    known = idempotency.lookup(request.user, [key for key in keys if isinstance(key, str)])
+    results = []
+    for entry in orders:
+        key = entry.get('idempotency_key') if isinstance(entry, dict) else None
+        if not isinstance(key, str) or not key or len(key) > idempotency.MAX_KEY_LENGTH:
+            results.append({'idempotency_key': key, 'status': status.HTTP_400_BAD_REQUEST,
+                            'errors': {'idempotency_key': f'required, 1-{idempotency.MAX_KEY_LENGTH} characters'}})
+            continue
+        data = {field: value for field, value in entry.items() if field != 'idempotency_key'}
+        status_code, body, replayed = idempotency.run_once(
+            request.user, key, data, lambda: _create_order(request.user, data), existing=known.get(key))
+        result = {'idempotency_key': key, 'status': status_code, 'replayed': replayed}
+        result['order' if status_code == status.HTTP_201_CREATED else 'errors'] = body
+        results.append(result)
+    return Response({'results': results})
+
+
+KITCHEN_STATUSES = [Order.STATUS_ACCEPTED, Order.STATUS_PREPARING, Order.STATUS_READY]
+
+
+@api_view(['GET'])
+def kitchen_orders(request):
+    """Orders the kitchen is working on, as a flat projection built from one values() query"""
+    rows = (OrderItem.objects
+            .filter(order__status__in=KITCHEN_STATUSES)
+            .order_by('order__created_at', 'order_id', 'id')
+            .values_list('order_id', 'order__table_number', 'order__status', 'order__created_at',
+                         'menu_item__name', 'quantity'))
+    now = timezone.now()
+    orders = {}
+    for order_id, table_number, status_val, created_at, name, quantity in rows:
+        order = orders.get(order_id)
+        if order is None:
+            order = orders[order_id] = {
+                'id': order_id,
+                'table_number': table_number,
+                'status': status_val,
+                'created_at': created_at,
+                'elapsed_seconds': int((now - created_at).total_seconds()),
+                'items': [],
+            }
+        order['items'].append({'name': name, 'quantity': quantity})
+    return Response(list(orders.values()))
 
 
 @api_view(['GET'])
 def order_detail(request, pk):
-    order = get_object_or_404(Order, pk=pk)
+    order = get_object_or_404(orders_with_items(), pk=pk)
     return Response(OrderSerializer(order).data)
 
 
+def _status_roles(status_val):
+    """Roles allowed to move an order to `status_val`"""
+    # reception can accept/close, chef can move to preparing/ready/served
+    if status_val in [Order.STATUS_ACCEPTED, Order.STATUS_CLOSED]:
+        return ['reception']
+    if status_val in [Order.STATUS_PREPARING, Order.STATUS_READY, Order.STATUS_SERVED]:
+        return ['chef']
+    return ['waiter', 'reception', 'chef']
+
+
+def _is_status(value):
+    return isinstance(value, str) and value in dict(Order.STATUS_CHOICES)
+
+
 @api_view(['POST'])
 def order_change_status(request, pk):
-    order = get_object_or_404(Order, pk=pk)
     status_val = request.data.get('status')
-    if status_val not in dict(Order.STATUS_CHOICES):
+    if not _is_status(status_val):
         return Response({'error': 'invalid status'}, status=status.HTTP_400_BAD_REQUEST)
     # Role-based permissions for status changes
-    # reception can accept/close, chef can move to preparing/ready/served
-    allowed = []
-    if status_val in [Order.STATUS_ACCEPTED, Order.STATUS_CLOSED]:
-        allowed = ['reception']
-    elif status_val in [Order.STATUS_PREPARING, Order.STATUS_READY, Order.STATUS_SERVED]:
-        allowed = ['chef']
-    else:
-        allowed = ['waiter', 'reception', 'chef']
-
-    if not _has_role(request.user, allowed):
+    if not _has_role(request.user, _status_roles(status_val)):
         return Response({'detail': 'Insufficient role to change to this status'}, status=status.HTTP_403_FORBIDDEN)
 
-    order.status = status_val
-    order.save()
-    return Response(OrderSerializer(order).data)
+    # Clients may state the status they saw; otherwise it is the one before the target
+    expected = request.data.get('expected_status') or Order.PREVIOUS_STATUS.get(status_val)
+    if expected is not None and not _is_status(expected):
+        return Response({'error': 'invalid expected_status'}, status=status.HTTP_400_BAD_REQUEST)
+    if Order.NEXT_STATUS.get(expected) != status_val:
+        source = f'from {expected} ' if expected else ''
+        return Response({'error': f'cannot change status {source}to {status_val}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    if not Order.transition(pk, expected, status_val):
+        current = Order.objects.filter(pk=pk).values_list('status', flat=True).first()
+        if current is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'error': 'status conflict', 'expected_status': expected, 'current_status': current},
+                        status=status.HTTP_409_CONFLICT)
+
+    publish_status(pk, status_val)
+    if status_val == Order.STATUS_CLOSED:
+        transaction.on_commit(lambda: analytics.record_closed_orders([pk]))
+    return Response({'id': pk, 'status': status_val, 'previous_status': expected})
+
+
+ORDERS_MAX_STATUS_BATCH = 200
+
+
+@api_view(['POST'])
+def orders_batch_status(request):
+    """Apply several status changes in one transaction.
+
+    Body: {"changes": [{"id": 1, "expected_status": "accepted", "status": "preparing"}, ...]}
+    Every change gets its own result; valid ones are committed together with one
+    conditional UPDATE per distinct transition.
+    """
+    changes = request.data.get('changes')
+    if not isinstance(changes, list) or not changes:
+        return Response({'error': 'changes must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(changes) > ORDERS_MAX_STATUS_BATCH:
+        return Response({'error': f'at most {ORDERS_MAX_STATUS_BATCH} changes per request'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    results = []
+    wanted = {}
+    for change in changes:
+        try:
+            pk = int(change.get('id'))
+        except (AttributeError, TypeError, ValueError):
+            results.append({'id': None, 'result': 'invalid', 'error': 'id is required'})
+            continue
+        status_val = change.get('status')
+        expected = change.get('expected_status')
+        if not expected and _is_status(status_val):
+            expected = Order.PREVIOUS_STATUS.get(status_val)
+        result = {'id': pk, 'status': status_val}
+        results.append(result)
+        if not _is_status(status_val) or (expected is not None and not _is_status(expected)):
+            result.update(result='invalid', error='status and expected_status must be order statuses')
+        elif Order.NEXT_STATUS.get(expected) != status_val:
+            result.update(result='invalid', error=f'cannot change status to {status_val}')
+        elif not _has_role(request.user, _status_roles(status_val)):
+            result.update(result='forbidden')
+        elif pk in wanted:
+            result.update(result='invalid', error='duplicate order id')
+        else:
+            result['expected_status'] = expected
+            wanted[pk] = result
+
+    with transaction.atomic():
+        current = dict(Order.objects.select_for_update().filter(pk__in=list(wanted)).values_list('pk', 'status'))
+        groups = {}
+        for pk, result in wanted.items():
+            if pk not in current:
+                result['result'] = 'not_found'
+            elif current[pk] != result['expected_status']:
+                result.update(result='conflict', current_status=current[pk])
+            else:
+                groups.setdefault((result['expected_status'], result['status']), []).append(pk)
+        now = timezone.now()
+        for (expected, status_val), pks in groups.items():
+            updated = Order.objects.filter(pk__in=pks, status=expected).update(status=status_val, updated_at=now)
+            if updated != len(pks):
+                # Another writer got in between the read above and the UPDATE (SQLite has no row locks)
+                rows = {pk: (status_now, updated_at) for pk, status_now, updated_at
+                        in Order.objects.filter(pk__in=pks).values_list('pk', 'status', 'updated_at')}
+                missed = {pk for pk in pks if rows.get(pk) != (status_val, now)}
+                for pk in missed:
+                    if pk in rows:
+                        wanted[pk].update(result='conflict', current_status=rows[pk][0])
+                    else:
+                        wanted[pk]['result'] = 'not_found'
+                pks = [pk for pk in pks if pk not in missed]
+            for pk in pks:
+                wanted[pk]['result'] = 'ok'
+                transaction.on_commit(lambda pk=pk, status_val=status_val: publish_status(pk, status_val))
+            if status_val == Order.STATUS_CLOSED:
+                transaction.on_commit(lambda pks=pks: analytics.record_closed_orders(pks))
+
+    return Response({'results': results})
+
+
+def _bill_job_data(job):
+    data = BillJobSerializer(job).data
+    if job.status == BillJob.STATUS_DONE:
+        # The rendered PDF lives in the bill cache; /bill/pdf/ serves it from there
+        data['pdf_url'] = reverse('order-bill-pdf', args=[job.order_id])
+    return data
 
 
 @api_view(['GET', 'POST'])
 def order_bill(request, pk):
-    order = get_object_or_404(Order, pk=pk)
-    data = OrderSerializer(order).data
-    # Simple bill text
-    lines = [f"Order #{order.id}", f"Guest: {order.guest_name}", f"Table: {order.table_number}", 'Items:']
-    for it in data['items']:
-        lines.append(f" - {it['quantity']} x {it['menu_item']['name']} @ {it['unit_price']} = {float(it['unit_price']) * it['quantity']}")
-    lines.append(f"Total: {data['total']}")
-    bill_text = '\n'.join(lines)
-
-    # Generate PDF
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer)
-    y = 800
-    p.setFont('Helvetica-Bold', 16)
-    p.drawString(50, y, f"Invoice - Order #{order.id}")
-    y -= 40
-    p.setFont('Helvetica', 12)
-    for line in lines:
-        p.drawString(50, y, line)
-        y -= 20
-        if y < 60:
-            p.showPage()
-            y = 800
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    pdf_data = buffer.getvalue()
-
-    # If POST with email -> send email
+    order = get_object_or_404(orders_with_items(), pk=pk)
+
+    # Email delivery runs in the bill worker (run_bill_worker)
     if request.method == 'POST':
         to_email = request.data.get('email')
-        if to_email:
-            email = EmailMessage(subject=f'Your bill for Order #{order.id}', body=bill_text, from_email=settings.DEFAULT_FROM_EMAIL, to=[to_email])
-            email.attach(f'Order_{order.id}.pdf', pdf_data, 'application/pdf')
-            try:
-                email.send()
-                return Response({'status': 'emailed', 'email': to_email})
-            except Exception as e:
-                return Response({'error': f'Email failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return Response({'error': 'no email provided'}, status=status.HTTP_400_BAD_REQUEST)
-
-    # Return PDF as base64 for preview
-    import base64
-    pdf_base64 = base64.b64encode(pdf_data).decode('utf-8')
-    return Response({'bill_text': bill_text, 'order': data, 'pdf': pdf_base64})
+        if not to_email:
+            return Response({'error': 'no email provided'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            validate_email(to_email if isinstance(to_email, str) else '')
+        except ValidationError:
+            return Response({'error': 'invalid email address'}, status=status.HTTP_400_BAD_REQUEST)
+        job = bills.enqueue(order, BillJob.KIND_EMAIL, email=to_email)
+        return Response({'status': 'queued', 'email': to_email, 'job': _bill_job_data(job)},
+                        status=status.HTTP_202_ACCEPTED)
+
+    data = OrderSerializer(order).data
+    lines = bills.bill_lines(order, data)
+    digest = bills.bill_digest(order, lines)
+    response = {'bill_text': '\n'.join(lines), 'order': data, 'digest': digest,
+                'pdf_url': reverse('order-bill-pdf', args=[order.id])}
+
+    # Include the PDF when identical bill content was already rendered; the
+    # preview itself only needs the text, so nothing is rendered here
+    pdf_data = bills.cached_pdf(digest)
+    if pdf_data is not None:
+        response['pdf'] = base64.b64encode(pdf_data).decode('utf-8')
+    return Response(response)
 
 
 @api_view(['GET'])
-@permission_classes([AllowAny])
-def table_stats(request):
-    """Get statistics about tables and orders"""
-    from django.db.models import Count, Q
-    
-    # Get all active orders (not closed)
-    active_orders = Order.objects.exclude(status='closed').select_related('waiter')
-    
-    # Group by table
+def order_bill_pdf(request, pk):
+    """The bill as a raw PDF stream, with the bill content hash as its ETag"""
+    order = get_object_or_404(orders_with_items(), pk=pk)
+    lines = bills.bill_lines(order, OrderSerializer(order).data)
+    etag = f'"{bills.bill_digest(order, lines)}"'
+    if _etag_matches(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        _, pdf_data = bills.render_pdf_cached(order, lines)
+        response = HttpResponse(pdf_data, content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="Order_{order.id}.pdf"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_view(['GET'])
+def bill_job_detail(request, pk):
+    """Status of a queued bill job; links the PDF once rendered"""
+    job = get_object_or_404(BillJob, pk=pk)
+    return Response(_bill_job_data(job))
+
+
+def _date_param(params, param, default=None):
+    """Query param `param` as a date, `default` when absent; ValueError unless it is a real YYYY-MM-DD date"""
+    value = params.get(param)
+    if not value:
+        return default
+    # parse_date() returns None for other formats and raises for impossible dates (2026-02-30)
+    day = parse_date(value) if len(value) == 10 else None
+    if day is None:
+        raise ValueError(value)
+    return day
+
+
+def _archived_orders():
+    return ArchivedOrder.objects.select_related('waiter').prefetch_related('items')
+
+
+@api_view(['GET'])
+def archived_orders_list(request):
+    """Read-only, keyset-paginated archive of closed orders (newest first).
+
+    Optional filters: table_number, from / to (ISO dates on created_at).
+    """
+    params = request.query_params
+    qs = _archived_orders()
+    if params.get('table_number'):
+        qs = qs.filter(table_number=params['table_number'])
+    for param, lookup in (('from', 'created_at__date__gte'), ('to', 'created_at__date__lte')):
+        try:
+            day = _date_param(params, param)
+        except ValueError:
+            return Response({'error': f'{param} must be a date (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+        if day is not None:
+            qs = qs.filter(**{lookup: day})
+    try:
+        limit = parse_limit(params.get('limit'), ORDERS_PAGE_SIZE, ORDERS_MAX_PAGE_SIZE)
+        rows, next_cursor = keyset_page(qs, params.get('cursor'), limit)
+    except InvalidCursor as e:
+        return Response({'error': f'invalid cursor: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+    with metrics.timer('serialize'):
+        results = ArchivedOrderSerializer(rows, many=True).data
+    return Response({'results': results, 'next': next_cursor})
+
+
+@api_view(['GET'])
+def archived_order_detail(request, pk):
+    order = get_object_or_404(_archived_orders(), pk=pk)
+    return Response(ArchivedOrderSerializer(order).data)
+
+
+@api_view(['GET'])
+def sales_analytics(request):
+    """Revenue of closed orders from the sales rollups.
+
+    Query params: group_by (hour, day, item, category, waiter; default day),
+    from / to (ISO dates on order time, inclusive; default today).
+    """
+    if not _has_role(request.user, ['reception']):
+        return Response({'detail': 'Insufficient role'}, status=status.HTTP_403_FORBIDDEN)
+    params = request.query_params
+    group_by = params.get('group_by', 'day')
+    if group_by not in analytics.GROUP_BY:
+        return Response({'error': f'group_by must be one of {", ".join(analytics.GROUP_BY)}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    days = {}
+    for param in ('from', 'to'):
+        try:
+            days[param] = _date_param(params, param, default=timezone.localdate())
+        except ValueError:
+            return Response({'error': f'{param} must be a date (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+    if days['from'] > days['to']:
+        return Response({'error': 'from must not be after to'}, status=status.HTTP_400_BAD_REQUEST)
+
+    start = timezone.make_aware(datetime.combine(days['from'], datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(days['to'] + timedelta(days=1), datetime.min.time()))
+    results = analytics.sales(group_by, start, end)
+    totals = analytics.totals(start, end)
+    return Response({'group_by': group_by, 'from': days['from'], 'to': days['to'],
+                     'results': results, 'totals': totals})
+
+
+def _active_orders():
+    """Orders not yet closed, oldest first"""
+    return orders_with_items().exclude(status=Order.STATUS_CLOSED).order_by('created_at')
+
+
+def _status_count_rows():
+    """One grouped COUNT for every status"""
+    return Order.objects.values('status').annotate(count=Count('id')).order_by()
+
+
+def _table_stats_data(active_orders, status_rows):
+    """table_stats data from the active orders and the per-status count rows"""
     occupied_tables = {}
-    for order in active_orders:
-        table = order.table_number
-        if table not in occupied_tables:
-            occupied_tables[table] = []
-        occupied_tables[table].append(OrderSerializer(order).data)
-    
-    # Calculate statistics
-    total_orders = Order.objects.count()
-    active_count = active_orders.count()
-    closed_count = Order.objects.filter(status='closed').count()
-    
-    status_counts = {}
-    for choice in Order.STATUS_CHOICES:
-        status = choice[0]
-        count = Order.objects.filter(status=status).count()
-        status_counts[status] = count
-    
-    return Response({
+    with metrics.timer('serialize'):
+        active_data = OrderSerializer(active_orders, many=True).data
+    for order in active_data:
+        occupied_tables.setdefault(order['table_number'], []).append(order)
+
+    status_counts = {choice[0]: 0 for choice in Order.STATUS_CHOICES}
+    for row in status_rows:
+        status_counts[row['status']] = row['count']
+
+    total_orders = sum(status_counts.values())
+    closed_count = status_counts.get(Order.STATUS_CLOSED, 0)
+
+    return {
         'occupied_tables': occupied_tables,
         'total_tables_occupied': len(occupied_tables),
         'total_orders': total_orders,
-        'active_orders': active_count,
+        'active_orders': total_orders - closed_count,
         'closed_orders': closed_count,
         'status_breakdown': status_counts,
-    })
+    }
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def table_stats(request):
+    """Get statistics about tables and orders"""
+    return Response(_table_stats_data(_active_orders(), _status_count_rows()))
+
+
+@require_GET
+def order_events(request):
+    """Server-Sent Events stream of order created / status changed events.
+
+    Connections are closed after POS_EVENT_STREAM_TIMEOUT seconds; browsers
+    reconnect automatically and resume from Last-Event-ID, or get a `reset`
+    event asking for a full reload when that id can't be resumed (e.g. after
+    a restart). Each stream holds a worker thread, so past
+    POS_EVENT_MAX_STREAMS open streams this answers 503 and clients poll
+    instead (the ASGI stream in async_views has no cap).
+    """
+    after, reset = broker.resume_point(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+
+    def stream(after):
+        deadline = time.monotonic() + settings.POS_EVENT_STREAM_TIMEOUT
+        yield f"retry: {settings.POS_EVENT_RETRY_MS}\n\n"
+        if reset:
+            yield format_reset(after)
+        while time.monotonic() < deadline:
+            events = broker.wait(after, settings.POS_EVENT_KEEPALIVE_SECONDS)
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for seq, kind, payload in events:
+                yield format_event(seq, kind, payload)
+                after = seq
+
+    held = stream_limit.hold(stream(after), settings.POS_EVENT_MAX_STREAMS)
+    if held is None:
+        response = HttpResponse('Too many open event streams, poll instead', status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                content_type='text/plain')
+        response['Retry-After'] = str(settings.POS_EVENT_STREAM_TIMEOUT)
+        return response
+    response = StreamingHttpResponse(held, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus text-format request metrics for this process"""
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4')
@@ -1,73 +1,88 @@
-import React, { useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useState } from 'react';
 import { api } from '../services/api';
+import { useOrderEvents } from '../services/orderFeed';
+
+const NEXT_STATUS = {accepted: 'preparing', preparing: 'ready', ready: 'served'};
+
+const formatElapsed = (seconds) => {
+  const minutes = Math.floor(seconds / 60);
+  return minutes < 60 ? `${minutes}m` : `${Math.floor(minutes / 60)}h ${minutes % 60}m`;
+};
 
 export default function KitchenPortal({ user }) {
   const [orders, setOrders] = useState([]);
 
-  const load = () => {
-    api.get('/orders/').then(setOrders);
-  };
+  const load = useCallback(() => {
+    api.get('/kitchen/orders/').then(setOrders);
+  }, []);
+
+  const streaming = useOrderEvents(load);
 
   useEffect(() => {
     load();
-    const interval = setInterval(load, 5000);
+    const interval = setInterval(load, streaming ? 60000 : 5000);
     return () => clearInterval(interval);
-  }, []);
+  }, [load, streaming]);
 
   const nextStatus = (o) => {
-    const seq = ['pending', 'accepted', 'preparing', 'ready', 'served', 'closed'];
-    const idx = seq.indexOf(o.status);
-    const next = seq[Math.min(seq.length - 1, idx + 1)];
-    api.post(`/orders/${o.id}/status/`, {status: next}).then(load);
+    api.post(`/orders/${o.id}/status/`, {status: NEXT_STATUS[o.status], expected_status: o.status})
+      .then(load)
+      .catch(() => load());
   };
 
-  const activeOrders = orders.filter(o => !['closed', 'served'].includes(o.status));
+  const advanceAll = () => {
+    const changes = orders.map(o => ({id: o.id, expected_status: o.status, status: NEXT_STATUS[o.status]}));
+    api.post('/orders/status/', {changes}).then(load).catch(() => load());
+  };
 
   return (
     <div className="card">
       <div className="card-header">
-        <h2 className="card-title">Kitchen - Active Orders ({activeOrders.length})</h2>
-        <button onClick={load} className="btn btn-ghost btn-sm">Refresh</button>
+        <h2 className="card-title">Kitchen - Active Orders ({orders.length})</h2>
+        <div style={{display: 'flex', gap: '8px'}}>
+          {orders.length > 0 && (
+            <button onClick={advanceAll} className="btn btn-success btn-sm">Advance All</button>
+          )}
+          <button onClick={load} className="btn btn-ghost btn-sm">Refresh</button>
+        </div>
       </div>
       <table>
         <thead>
           <tr>
             <th>Order #</th>
-            <th>Guest</th>
             <th>Table</th>
+            <th>Waiting</th>
             <th>Status</th>
             <th>Items</th>
             <th>Action</th>
           </tr>
         </thead>
         <tbody>
-          {activeOrders.map(o => (
+          {orders.map(o => (
             <tr key={o.id}>
               <td><strong>#{o.id}</strong></td>
-              <td>{o.guest_name}</td>
               <td>{o.table_number}</td>
+              <td>{formatElapsed(o.elapsed_seconds)}</td>
               <td>
                 <span className={`status-badge status-${o.status}`}>
                   {o.status}
                 </span>
               </td>
               <td>
-                {o.items.map(it => (
-                  <div key={it.id}>{it.quantity}x {it.menu_item.name}</div>
+                {o.items.map((it, idx) => (
+                  <div key={idx}>{it.quantity}x {it.name}</div>
                 ))}
               </td>
               <td>
-                {o.status !== 'served' && (
-                  <button onClick={() => nextStatus(o)} className="btn btn-success btn-sm">
-                    Advance
-                  </button>
-                )}
+                <button onClick={() => nextStatus(o)} className="btn btn-success btn-sm">
+                  Advance
+                </button>
               </td>
             </tr>
           ))}
         </tbody>
       </table>
-      {activeOrders.length === 0 && (
+      {orders.length === 0 && (
         <div style={{textAlign: 'center', padding: '40px', color: 'var(--text-secondary)'}}>
           No active orders
         </div>
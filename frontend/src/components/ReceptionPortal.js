@@ -1,30 +1,33 @@
 import React, { useEffect, useState } from 'react';
 import { api } from '../services/api';
+import { useOrderFeed } from '../services/orderFeed';
 
 export default function ReceptionPortal({ user }) {
-  const [orders, setOrders] = useState([]);
   const [stats, setStats] = useState(null);
   const [billPreview, setBillPreview] = useState(null);
   const [showTables, setShowTables] = useState(false);
 
+  const loadStats = () => {
+    api.get('/tables/stats/').then(setStats);
+  };
+
+  const [orders, loadOrders, streaming] = useOrderFeed({ onEvent: loadStats });
+
   const load = () => {
-    Promise.all([
-      api.get('/orders/'),
-      api.get('/tables/stats/')
-    ]).then(([ordersData, statsData]) => {
-      setOrders(ordersData);
-      setStats(statsData);
-    });
+    loadOrders();
+    loadStats();
   };
 
   useEffect(() => {
-    load();
-    const interval = setInterval(load, 5000);
+    loadStats();
+    const interval = setInterval(loadStats, streaming ? 60000 : 5000);
     return () => clearInterval(interval);
-  }, []);
+  }, [streaming]);
 
-  const changeStatus = (id, status) => {
-    api.post(`/orders/${id}/status/`, {status}).then(load);
+  const changeStatus = (o, status) => {
+    api.post(`/orders/${o.id}/status/`, {status, expected_status: o.status})
+      .then(load)
+      .catch(() => load());
   };
 
   const previewBill = async (id) => {
@@ -70,7 +73,7 @@ export default function ReceptionPortal({ user }) {
     if (!email) return;
     try {
       await api.post(`/orders/${id}/bill/`, {email});
-      alert('Bill sent to ' + email);
+      alert('Bill queued for delivery to ' + email);
     } catch (error) {
       alert('Email failed. Using console email backend - check Django console.');
     }
@@ -171,7 +174,7 @@ export default function ReceptionPortal({ user }) {
                 <td>
                   <div style={{display: 'flex', gap: '8px'}}>
                     {o.status === 'pending' && (
-                      <button onClick={() => changeStatus(o.id, 'accepted')} className="btn btn-success btn-sm">Accept</button>
+                      <button onClick={() => changeStatus(o, 'accepted')} className="btn btn-success btn-sm">Accept</button>
                     )}
                     {o.status !== 'closed' && (
                       <>
@@ -180,7 +183,7 @@ export default function ReceptionPortal({ user }) {
                       </>
                     )}
                     {o.status === 'served' && (
-                      <button onClick={() => changeStatus(o.id, 'closed')} className="btn btn-primary btn-sm">Close</button>
+                      <button onClick={() => changeStatus(o, 'closed')} className="btn btn-primary btn-sm">Close</button>
                     )}
                   </div>
                 </td>
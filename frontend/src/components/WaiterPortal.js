@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { api } from '../services/api';
+import { useOrderQueue } from '../services/orderQueue';
 
 export default function WaiterPortal({ user }) {
   const [menu, setMenu] = useState([]);
@@ -8,6 +9,19 @@ export default function WaiterPortal({ user }) {
   const [guest, setGuest] = useState('');
   const [table, setTable] = useState('');
   const [created, setCreated] = useState(null);
+  const [search, setSearch] = useState('');
+  const [vegOnly, setVegOnly] = useState(false);
+  const [results, setResults] = useState(null);
+  const [pending, submitOrder] = useOrderQueue({
+    onResult: (result, payload) => {
+      if (result.status === 201) {
+        setCreated(result.order);
+        setTimeout(() => setCreated(null), 5000);
+      } else {
+        alert(`Failed to create order for ${payload.guest_name}: ` + JSON.stringify(result.errors));
+      }
+    },
+  });
 
   useEffect(() => {
     Promise.all([api.get('/menu/'), api.get('/menu/categories/')])
@@ -17,6 +31,27 @@ export default function WaiterPortal({ user }) {
       });
   }, []);
 
+  // Search runs on the server so large menus need not be filtered on the tablet
+  useEffect(() => {
+    if (!search.trim() && !vegOnly) {
+      setResults(null);
+      return undefined;
+    }
+    const params = new URLSearchParams({limit: '100'});
+    if (search.trim()) params.set('q', search.trim());
+    if (vegOnly) params.set('is_vegetarian', 'true');
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      api.get(`/menu/search/?${params}`)
+        .then(data => { if (!cancelled) setResults(data.results); })
+        .catch(() => { if (!cancelled) setResults([]); });
+    }, 200);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [search, vegOnly]);
+
   const addItem = (item) => {
     const exists = orderItems.find(i => i.menu_item.id === item.id);
     if (exists) {
@@ -58,17 +93,11 @@ export default function WaiterPortal({ user }) {
       return;
     }
 
-    try {
-      const payload = {guest_name: guest, table_number: table, items: orderItems.map(i => ({menu_item_id: i.menu_item_id, quantity: i.quantity}))};
-      const data = await api.post('/orders/', payload);
-      setCreated(data);
-      setOrderItems([]);
-      setGuest('');
-      setTable('');
-      setTimeout(() => setCreated(null), 5000);
-    } catch (error) {
-      alert('Failed to create order: ' + (error.message || 'Unknown error'));
-    }
+    const payload = {guest_name: guest, table_number: table, items: orderItems.map(i => ({menu_item_id: i.menu_item_id, quantity: i.quantity}))};
+    setOrderItems([]);
+    setGuest('');
+    setTable('');
+    await submitOrder(payload);
   };
 
   const total = orderItems.reduce((sum, item) => sum + parseFloat(item.unit_price) * item.quantity, 0);
@@ -81,6 +110,20 @@ export default function WaiterPortal({ user }) {
     return Object.values(grouped);
   };
 
+  const renderItem = (item) => (
+    <div key={item.id} className="menu-item-card" onClick={() => addItem(item)}>
+      <div className="menu-item-header">
+        <h3 className="menu-item-name">{item.name}</h3>
+        <span className="menu-item-price">₹{item.price}</span>
+      </div>
+      <p className="menu-item-description">{item.description}</p>
+      <div className="menu-item-badges">
+        {item.is_vegetarian && <span className="badge badge-veg">🌱 Veg</span>}
+        {item.spice_level && <span className="badge badge-spicy">🌶️ {item.spice_level}</span>}
+      </div>
+    </div>
+  );
+
   return (
     <div>
       <div className="card">
@@ -120,31 +163,33 @@ export default function WaiterPortal({ user }) {
           </div>
         )}
 
+        {pending.length > 0 && <div style={{marginTop: '16px', padding: '12px', background: '#fef9c3', borderRadius: '8px'}}>{pending.length} order(s) waiting to be sent - they will be sent automatically when the connection is back</div>}
         {created && <div style={{marginTop: '16px', padding: '12px', background: '#dcfce7', borderRadius: '8px'}}>✓ Order #{created.id} created!</div>}
       </div>
 
+      <div style={{display: 'flex', gap: '16px', alignItems: 'center', margin: '16px 0'}}>
+        <input className="form-input" style={{flex: 1}} placeholder="Search menu..." value={search} onChange={e => setSearch(e.target.value)} />
+        <label style={{whiteSpace: 'nowrap'}}>
+          <input type="checkbox" checked={vegOnly} onChange={e => setVegOnly(e.target.checked)} /> Veg only
+        </label>
+      </div>
+
       <div className="menu-categories">
-        {groupByCategory().map(category => (
+        {results !== null ? (
+          <div className="category-section">
+            <div className="category-header">
+              <h2 className="category-name">Search Results</h2>
+              {results.length === 0 && <p className="category-description">No matching items</p>}
+            </div>
+            <div className="menu-grid">{results.map(renderItem)}</div>
+          </div>
+        ) : groupByCategory().map(category => (
           <div key={category.id} className="category-section">
             <div className="category-header">
               <h2 className="category-name">{category.name}</h2>
               <p className="category-description">{category.description}</p>
             </div>
-            <div className="menu-grid">
-              {category.items.map(item => (
-                <div key={item.id} className="menu-item-card" onClick={() => addItem(item)}>
-                  <div className="menu-item-header">
-                    <h3 className="menu-item-name">{item.name}</h3>
-                    <span className="menu-item-price">₹{item.price}</span>
-                  </div>
-                  <p className="menu-item-description">{item.description}</p>
-                  <div className="menu-item-badges">
-                    {item.is_vegetarian && <span className="badge badge-veg">🌱 Veg</span>}
-                    {item.spice_level && <span className="badge badge-spicy">🌶️ {item.spice_level}</span>}
-                  </div>
-                </div>
-              ))}
-            </div>
+            <div className="menu-grid">{category.items.map(renderItem)}</div>
           </div>
         ))}
       </div>
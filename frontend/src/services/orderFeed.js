@@ -0,0 +1,111 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+import { api } from './api';
+
+const EVENTS_URL = '/api/events/';
+const REFUSED_RETRY_MS = 60000;
+
+// Calls onEvent for every order event pushed by the server, and with 'reset'
+// when events may have been missed. Returns whether the stream is currently
+// connected so callers can relax their polling.
+export function useOrderEvents(onEvent) {
+  const [connected, setConnected] = useState(false);
+  const handler = useRef(onEvent);
+  handler.current = onEvent;
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+    let source;
+    let retry;
+    const dispatch = (e) => handler.current(e.type, JSON.parse(e.data));
+    const connect = () => {
+      source = new EventSource(EVENTS_URL);
+      source.onopen = () => setConnected(true);
+      source.onerror = () => {
+        setConnected(false);
+        // The browser gives up when the server refuses the stream (503 when
+        // it is at capacity); keep polling and try again later
+        if (source.readyState === EventSource.CLOSED) retry = setTimeout(connect, REFUSED_RETRY_MS);
+      };
+      source.addEventListener('order_created', dispatch);
+      source.addEventListener('order_status', dispatch);
+      // The server could not resume from our last event (it restarted):
+      // callers reload everything
+      source.addEventListener('reset', dispatch);
+    };
+    connect();
+    return () => {
+      clearTimeout(retry);
+      source.close();
+    };
+  }, []);
+
+  return connected;
+}
+
+// Stores new or modified orders in byId; returns whether anything changed
+function mergeOrders(byId, results) {
+  let changed = false;
+  results.forEach(o => {
+    const known = byId.get(o.id);
+    if (!known || known.updated_at !== o.updated_at) {
+      byId.set(o.id, o);
+      changed = true;
+    }
+  });
+  return changed;
+}
+
+// Keeps a local copy of /orders/ in sync. The first load fetches the newest
+// page of orders; after that only orders created or modified since the last
+// cursor the server handed out are fetched. The server re-sends the last few
+// seconds of changes on every poll, so orders are merged by id. Fetches
+// immediately on pushed events and falls back to polling when the stream is
+// down; onEvent, if given, is called after each pushed event as well.
+export function useOrderFeed({ intervalMs = 5000, idleIntervalMs = 60000, pageSize = 200, onEvent } = {}) {
+  const [orders, setOrders] = useState([]);
+  const byId = useRef(new Map());
+  const cursor = useRef(null);
+
+  const load = useCallback(async () => {
+    let changed = false;
+    if (cursor.current === null) {
+      const data = await api.get(`/orders/?limit=${pageSize}`);
+      mergeOrders(byId.current, data.results);
+      // A fresh start replaces whatever was shown before
+      changed = true;
+      cursor.current = data.since;
+    } else {
+      let hasMore = true;
+      while (hasMore) {
+        const data = await api.get(`/orders/?since=${encodeURIComponent(cursor.current)}`);
+        changed = mergeOrders(byId.current, data.results) || changed;
+        cursor.current = data.cursor || cursor.current;
+        hasMore = data.has_more;
+      }
+    }
+    if (changed) {
+      const sorted = Array.from(byId.current.values())
+        .sort((a, b) => (b.created_at.localeCompare(a.created_at)) || (b.id - a.id));
+      setOrders(sorted);
+    }
+  }, [pageSize]);
+
+  const connected = useOrderEvents((kind, payload) => {
+    if (kind === 'reset') {
+      // Start over from the newest page; stale orders are dropped
+      byId.current = new Map();
+      cursor.current = null;
+    }
+    load();
+    if (onEvent) onEvent(kind, payload);
+  });
+  const pollMs = connected ? idleIntervalMs : intervalMs;
+
+  useEffect(() => {
+    load();
+    const interval = setInterval(load, pollMs);
+    return () => clearInterval(interval);
+  }, [load, pollMs]);
+
+  return [orders, load, connected];
+}
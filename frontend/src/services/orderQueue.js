@@ -0,0 +1,77 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+import { api } from './api';
+
+const QUEUE_KEY = 'pendingOrders';
+const MAX_BATCH = 50;
+
+function readQueue() {
+  try {
+    return JSON.parse(localStorage.getItem(QUEUE_KEY)) || [];
+  } catch (e) {
+    return [];
+  }
+}
+
+function writeQueue(queue) {
+  localStorage.setItem(QUEUE_KEY, JSON.stringify(queue));
+}
+
+function newKey() {
+  if (window.crypto && window.crypto.randomUUID) return window.crypto.randomUUID();
+  return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
+// Orders are queued in localStorage under an idempotency key and flushed to
+// /orders/batch/, so a dropped connection never loses an order and a retried
+// flush never duplicates one. Flushes on submit, when the browser comes back
+// online and every retryMs while anything is pending. onResult is called
+// with each server result ({status, order | errors}) and its queued payload.
+export function useOrderQueue({ retryMs = 15000, onResult } = {}) {
+  const [pending, setPending] = useState(() => readQueue());
+  const flushing = useRef(false);
+  const handler = useRef(onResult);
+  handler.current = onResult;
+
+  const flush = useCallback(async () => {
+    const queue = readQueue();
+    if (flushing.current || queue.length === 0) return;
+    flushing.current = true;
+    try {
+      const batch = queue.slice(0, MAX_BATCH);
+      const data = await api.post('/orders/batch/', { orders: batch });
+      const done = new Set();
+      data.results.forEach((result, i) => {
+        // 409 means the same key is still being processed; try again later
+        if (result.status === 409 || result.status >= 500) return;
+        done.add(batch[i].idempotency_key);
+        if (handler.current) handler.current(result, batch[i]);
+      });
+      writeQueue(readQueue().filter(entry => !done.has(entry.idempotency_key)));
+    } catch (e) {
+      // Offline or server error: keep everything queued for the next attempt
+    } finally {
+      flushing.current = false;
+      setPending(readQueue());
+    }
+  }, []);
+
+  const submit = useCallback((payload) => {
+    writeQueue([...readQueue(), { ...payload, idempotency_key: newKey() }]);
+    setPending(readQueue());
+    return flush();
+  }, [flush]);
+
+  useEffect(() => {
+    window.addEventListener('online', flush);
+    flush();
+    return () => window.removeEventListener('online', flush);
+  }, [flush]);
+
+  useEffect(() => {
+    if (pending.length === 0) return undefined;
+    const timer = setInterval(flush, retryMs);
+    return () => clearInterval(timer);
+  }, [pending.length, flush, retryMs]);
+
+  return [pending, submit, flush];
+}